@@ -2,34 +2,50 @@
 "x_i_63, x_i_62, ..., x_i_0" 表示第 (i+1) 轮的输入。
 """
 
-from gurobipy import *
+import json
+import numpy as np
 import os
-import time
-
-
-class Gift:
-    def __init__(self, round):
-        self.round = round
-        self.blocksize = 64
-        self.brute_force_flag = '0'
-
-        # 设置 MILP 模型的文件名，模型文件存放路径为 "model" 文件夹
-        self.model_file_name = "./model/GIFT_round%d.lp" % self.round
-        # 设置结果文件的文件名，存放路径为 "result" 文件夹
-        self.result_file_name = "./result/GIFT_round%d_result.txt" % self.round
-
-        # 确保 "model" 文件夹存在，不存在则创建
-        os.makedirs("./model", exist_ok=True)  # 确保该文件夹存在
-        # 确保 "result" 文件夹存在，不存在则创建
-        os.makedirs("./result", exist_ok=True)  # 来确保该文件夹存在
+import sys
+
+# 仓库根目录，用于导入 Milp 中的模型引擎
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from Milp import CipherModel, Permute, derive_inequalities, SBOX_DIR
+
+# 已推导的 S 盒 CNF，键为 S 盒或不等式
+_derived_cnf = {}
+
+
+def derive_cnf(sbox=None, inequalities=None):
+    """
+    推导精确描述 S 盒分割轨迹的极小 CNF。给出 S 盒时结果缓存在磁盘中（见 Sbox/cache.py），
+    否则从不等式描述的点集推导。
+
+    参数:
+        sbox (list): S 盒表
+        inequalities (list): 不等式列表，仅在未给出 sbox 时使用
+    返回:
+        list: 子句列表，文字 1..8 依次对应不等式的 8 个系数
+    """
+    key = tuple(sbox) if sbox is not None else json.dumps(inequalities)
+    if key not in _derived_cnf:
+        if SBOX_DIR not in sys.path:
+            sys.path.append(SBOX_DIR)
+        if sbox is not None:
+            from cache import LookupCNF
+            _derived_cnf[key] = LookupCNF(sbox)
+        else:
+            from cnf import TrailCNF
+            points = [[(x >> (7 - c)) & 1 for c in range(8)] for x in range(256)]
+            points = [p for p in points if all(sum(a * b for a, b in zip(p, coff)) + coff[8] >= 0 for coff in inequalities)]
+            _derived_cnf[key] = TrailCNF(points)
+    return _derived_cnf[key]
 
-        # 创建并立即关闭模型文件，确保文件存在
-        with open(self.model_file_name, "w") as fileobj:
-            pass
 
-        # 创建并立即关闭结果文件，确保文件存在
-        with open(self.result_file_name, "w") as fileobj:
-            pass
+class Gift(CipherModel):
+    # Gift Sbox
+    SBOX = [0x1, 0xa, 0x4, 0xc, 0x6, 0xf, 0x3, 0x9, 0x2, 0xd, 0xb, 0x7, 0x5, 0x0, 0x8, 0xe]
 
     # Linear inequalities for the Gift Sbox
     S_T = [[1, 1, 1, 1, -1, -1, -1, -1, 0],
@@ -49,292 +65,202 @@ class Gift:
            [-1, 0, 0, -2, -1, 1, -2, 2, 4]]
     NUMBER = 9
 
-    def generate_continuous_arrays(self, n, total_elements=64):
-        """
-        生成从 0 到 total_elements - 1 的连续数组，数组长度为 n。
-
-        参数:
-            n (int): 数组的长度
-            total_elements (int): 总元素个数（分组长度），默认为 64
-            返回:
-            list: 所有可能的连续数组的列表，按降序排列
-            """
-        if n > total_elements:
-            raise ValueError(f"数组长度不能大于分组长度（{total_elements}）")
-
-        # 生成从 0 到 total_elements - 1 的连续数组
-        arrays = [list(range(i, i + n)) for i in range(0, total_elements - n + 1)]
-        return arrays
-
-    def set_constant_bits(self):
-        """
-        设置常量比特位（constant_bits），这些比特位将用于后续的算法求解。
-        """
-        if self.brute_force_flag == '0':  # 如果选择了探测特定情况（0）
-            temp = input("请输入常数的位置（请用空格分隔）:\n")  # 询问用户输入常量位的列表
-            temp = temp.split()  # 将输入的字符串分割为一个列表
-            constant_bits = []  # 创建一个空列表，用来存储常量位
-            for element in temp:  # 遍历列表中的每个元素
-                constant_bits.append(int(element) - 1)  # 将元素转换为整数并添加到常量位列表中，作为常数项的索引
-            # 因为数组下标从零开始，所以要减1
-            if (len(constant_bits) > self.blocksize):
-                raise ValueError(f"数组长度不能大于分组长度（{self.blocksize}）")  # 检查输入是否有效
-            for index in constant_bits:
-                if index > self.blocksize:
-                    raise ValueError(f"常数比特位置不能大于分组长度（{self.blocksize}）")  # 检查输入是否有效
-            self.constant_bits = constant_bits
-            self.make_model()  # 调用make_model方法生成模型
-            self.solve_model()  # 调用solve_model方法求解模型
-
-        else:  # 如果选择了暴力破解（1）
-            # 用户输入数组的长度
-            n = int(input("请输入数组的长度："))
-            # 生成并打印连续的数组
-            arrays = self.generate_continuous_arrays(n)
-            for i in range(len(arrays)):  # 遍历所有可能的常量位
-                print("%d / %d" % (i + 1, len(arrays)))  # 输出当前进度
-                constant_bits = arrays[i]  # 将当前的常量位i作为列表传入
-                with open(self.model_file_name, 'w') as f:  # 清空模型文件内容，以便写入新模型
-                    pass
-                self.constant_bits = constant_bits
-                self.make_model()  # 调用make_model方法生成模型
-                self.solve_model()  # 调用solve_model方法求解模型
-
-    def set_brute_force_flag(self, brute_force_flag):
+    # P 盒：第 i 个比特移到第 P_BOX[i] 个比特
+    P_BOX = [
+        0, 17, 34, 51, 48, 1, 18, 35, 32, 49, 2, 19, 16, 33, 50, 3,
+        4, 21, 38, 55, 52, 5, 22, 39, 36, 53, 6, 23, 20, 37, 54, 7,
+        8, 25, 42, 59, 56, 9, 26, 43, 40, 57, 10, 27, 24, 41, 58, 11,
+        12, 29, 46, 63, 60, 13, 30, 47, 44, 61, 14, 31, 28, 45, 62, 15
+    ]
+
+    # 密码描述（见 Milp/engine.py）：第 i 轮的输出 x_i 经过 P 盒（第 0 轮没有）和 S 盒层得到 x_(i+1)，
+    # 第 k 个 S 盒的输入为 x[4k+3..4k]，输出为 x_(i+1)[4k+3..4k]；最后一轮的线性层省略
+    DESCRIPTION = {
+        "name": "GIFT",
+        "blocksize": 64,
+        "state": {"x": 64},
+        "input": ["x"],
+        "output": ["x"],
+        "round": [
+            ("permute", "x", P_BOX, {"from_round": 1}),
+            ("sbox", "x", "x", 4, True),
+        ],
+        "solve": "unit",
+    }
+
+    def __init__(self, round, sbox=None, inequalities=None, settings=None, super_sbox=False, export_lp=False,
+                 model_format="lp", presolve=False):
         """
-        设置是否进行暴力破解的标志。暴力破解模式通过设置 flag 为 '1' 来启用。
-
         参数:
-            brute_force_flag (str): '0' 表示不进行暴力破解，'1' 表示进行暴力破解
+            round (int): 轮数
+            sbox (list): 可选，S 盒表，给出时从 S 盒推导不等式
+            inequalities (list): 可选，直接给出的 S 盒不等式，优先于 sbox
+            settings (dict): 可选，推导不等式时的生成参数
+            super_sbox (bool): 可选，为 True 时前两轮合并为 4 个 16 比特超级 S 盒（要求轮数至少为 2）
+            export_lp (bool): 可选，为 True 时把模型另外导出为模型文件，求解本身不需要该文件
+            model_format (str): 可选，导出的模型文件格式，"lp" 或 "mps"，加上 ".gz" 时压缩
+            presolve (bool): 可选，为 True 时每次求解前先对模型做结构预处理，见 Milp/presolve.py
         """
-        self.brute_force_flag = brute_force_flag
-
-    def create_objective_function(self):
-        """
-        创建并写入 MILP 模型的目标函数。目标是所有变量的最小化总和。
-        """
-        fileobj = open(self.model_file_name, "a")
-        fileobj.write("Minimize\n")
-        eqn = []
-        for i in range(0, 64):
-            eqn.append("x" + "_" + str(self.round) + "_" + str(i))
-        temp = " + ".join(eqn)
-        fileobj.write(temp)
-        fileobj.write("\n")
-        fileobj.close()
+        self.super_sbox = super_sbox
+        # 超级 S 盒的不等式，按 (超级 S 盒, 输入) 缓存
+        self.super_inequalities = {}
+
+        # S 盒表，用于生成 SAT 模型；只给出不等式时为 None，此时 CNF 从不等式推导
+        self.sbox = sbox if sbox is not None else (Gift.SBOX if inequalities is None else None)
+
+        # 默认使用上面手工给出的 S_T，否则使用给定的或从 S 盒推导的不等式
+        if inequalities is not None:
+            self.S_T = [list(coff) for coff in inequalities]
+        elif sbox is not None:
+            self.S_T = derive_inequalities(sbox, settings)
+        assert all(len(coff) == Gift.NUMBER for coff in self.S_T)
+
+        super().__init__(round, Gift.DESCRIPTION, self.S_T, export_lp, model_format, presolve)
+        if super_sbox:
+            # 前两轮由 init 中的超级 S 盒约束给出，从第 2 轮的输出开始；
+            # 初始约束依赖于常量比特，每次重新生成模型
+            self.first_round = 2
+            self.rebuild_model = True
 
     @staticmethod
     def create_variables(n):
         """
-        生成模型中使用的变量。
+        生成 SAT 模型中使用的变量名。
 
         参数:
             n (int): 轮数
-            s (str): 变量名（例如 'u' 或 'v'）
         返回:
-            list: 生成的变量名列表，格式为 [s_n_0_0, s_n_0_1, ..., s_n_7_3]
+            list: 生成的变量名列表，格式为 [x_n_0, x_n_1, ..., x_n_63]
         """
         array = []
         for i in range(0, 64):
             array.append(("x" + "_" + str(n) + "_" + str(i)))
         return array
 
-    def constraintsBySbox(self, variable1, variable2):
+    @staticmethod
+    def variable_index(variable):
+        """
+        返回变量 x_i_j 在 DIMACS 文件中的编号 64 * i + j + 1
+        """
+        _, i, j = variable.split("_")
+        return 64 * int(i) + int(j) + 1
+
+    def clausesBySbox(self, variable1, variable2):
         """
-        生成并写入 Sbox 的约束。
+        生成 Sbox 的 CNF 子句，变量的对应关系与 MILP 模型中的 S 盒层相同。
 
         参数:
             variable1 (list): 输入变量
             variable2 (list): 输出变量
+        返回:
+            list: DIMACS 格式的子句列表
         """
-        fileobj = open(self.model_file_name, "a")
-        for k in range(0, 16):  # k的值取决于中间状态的长度以及s盒的结构。若s盒为4*4 = 16，中间状态为64位则需要
-            for coff in Gift.S_T:  # coff是s盒的多项式系数和常数项，前八位为系数，最后一位为常数项
-                temp = []
-                for u in range(0, 4):
-                    temp.append(
-                        str(coff[u]) + " " + variable1[(k * 4) + 3 - u])  # u的值为0，1，2，3 ; (k * 4) + 3 - u的值为3，2，1，0
-                for v in range(0, 4):
-                    temp.append(str(coff[v + 4]) + " " + variable2[
-                        (k * 4) + 3 - v])  # v + 4的值为4，5，6，7 ; (k * 4) + 3 - v的值为3，2，1，0
-                temp1 = " + ".join(temp)
-                temp1 = temp1.replace("+ -", "- ")
-                s = str(-coff[Gift.NUMBER - 1])  # 最后一位，即s盒的多项式常数项
-                s = s.replace("--", "")
-                temp1 += " >= " + s
-                fileobj.write(temp1)
-                fileobj.write("\n")
-        fileobj.close();
+        clauses = []
+        for k in range(0, 16):
+            # 第 c 个坐标：c < 4 时为输入 variable1[(k * 4) + 3 - c]，否则为输出 variable2[(k * 4) + 7 - c]
+            names = [variable1[(k * 4) + 3 - u] for u in range(4)] + [variable2[(k * 4) + 3 - v] for v in range(4)]
+            index = [Gift.variable_index(name) for name in names]
+            for clause in self.cnf:
+                clauses.append([index[l - 1] if l > 0 else -index[-l - 1] for l in clause])
+        return clauses
+
+    def make_cnf(self, bit):
+        """
+        生成检验第 bit 个输出比特（与 solve_model 中的 mask 相同）是否平衡的 DIMACS 文件：
+        文件不可满足时该比特平衡。
+
+        参数:
+            bit (int): 输出比特，取值 0..63
+        返回:
+            str: DIMACS 文件名
+        """
+        assert (self.round >= 1)
+        self.cnf = derive_cnf(self.sbox, self.S_T)
+        clauses = []
+        variablein = Gift.create_variables(0)
+        variableout = Gift.create_variables(1)
+        clauses += self.clausesBySbox(variablein, variableout)
+        for i in range(1, self.round):
+            variablein = Gift.p_layer(variableout)
+            variableout = Gift.create_variables(i + 1)
+            clauses += self.clausesBySbox(variablein, variableout)
+        # 初始分割属性，与 init 相同
+        input_state = Gift.create_variables(0)
+        for i in range(64):
+            literal = Gift.variable_index(input_state[63 - i])
+            clauses.append([-literal] if i in self.constant_bits else [literal])
+        # 输出为第 bit 个单位向量
+        for j, variable in enumerate(Gift.create_variables(self.round)):
+            literal = Gift.variable_index(variable)
+            clauses.append([literal] if j == bit else [-literal])
+
+        filename = "./model/GIFT_round%d_bit%d.cnf" % (self.round, bit)
+        with open(filename, "w") as fileobj:
+            fileobj.write("p cnf %d %d\n" % (64 * (self.round + 1), len(clauses)))
+            for clause in clauses:
+                fileobj.write(" ".join(map(str, clause)) + " 0\n")
+        return filename
 
     @staticmethod
     def p_layer(variable):  # 对应文章https://zhuanlan.zhihu.com/p/461549805中的p-Layer
         """
             P盒操作
         """
-        p_box = [
-            0, 17, 34, 51, 48, 1, 18, 35, 32, 49, 2, 19, 16, 33, 50, 3,
-            4, 21, 38, 55, 52, 5, 22, 39, 36, 53, 6, 23, 20, 37, 54, 7,
-            8, 25, 42, 59, 56, 9, 26, 43, 40, 57, 10, 27, 24, 41, 58, 11,
-            12, 29, 46, 63, 60, 13, 30, 47, 44, 61, 14, 31, 28, 45, 62, 15
-        ]
-        array = ["" for i in range(0, 64)]
-        for i in range(0, 64):
-            array[p_box[i]] = variable[i]
+        array = Permute(np.asarray(variable), Gift.P_BOX).tolist()
 
         # for i in range(0, 64):
         # 	array[int((4 * (i // 16)) + (16 * (((3 * ((i % 16) // 4) + (i % 4)) % 4))) + i % 4)] = variable[i]
         # print(array)
         return array
 
-    def constraint(self):
-        """
-            按照加密算法部件结构，生成约束
-        """
-        assert (self.round >= 1)
-        fileobj = open(self.model_file_name, "a")
-        fileobj.write("Subject To\n")
-        fileobj.close()
-        variablein = Gift.create_variables(0)
-        variableout = Gift.create_variables(1)
-        if self.round == 1:
-            self.constraintsBySbox(variablein, variableout)
-        # omit the last linear layer
-        else:
-            self.constraintsBySbox(variablein, variableout)
-            for i in range(1, self.round):
-                variablein = Gift.p_layer(variableout)
-                variableout = Gift.create_variables(i + 1)
-                self.constraintsBySbox(variablein, variableout)
-            # omit the last linear layer
-
-    def variable_binary(self):  # 写入二进制变量
-        """
-        在模型中写入变量
-        """
-        fileobj = open(self.model_file_name, "a")
-        fileobj.write("Binary\n")
-        for i in range(0, (self.round + 1)):
-            for j in range(0, 64):
-                fileobj.write("x_" + str(i) + "_" + str(j))
-                fileobj.write("\n")
-        fileobj.write("END")
-        fileobj.close()
-
     def init(self):
         """
-        生成由初始分割属性引入的初始约束条件。
+        生成由初始分割属性引入的初始约束条件，超级 S 盒模式下见 init_super_sbox。
         """
-        input_state = Gift.create_variables(0)
-        fileobj = open(self.model_file_name, "a")  # 打开文件以追加数据
-        eqn = []  # 初始化等式列表
-        for i in range(64):  # 遍历 64 个输入状态
-            if i in self.constant_bits:  # 如果是常量，设置为 0
-                fileobj.write("%s = 0\n" % input_state[63 - i])
-            else:  # 如果是活跃比特，设置为 1
-                fileobj.write("%s = 1\n" % input_state[63 - i])
-        fileobj.close()  # 关闭文件
+        if self.super_sbox:
+            self.init_super_sbox()
+            return
+        super().init()
 
-    def make_model(self):
+    @staticmethod
+    def super_sbox_wiring(q):
         """
-        生成MILP模型
+        返回第 q 个超级 S 盒（第一轮的 S 盒 4q..4q+3，第二轮的 S 盒 q, q+4, q+8, q+12）内部的比特连线：
+        局部比特 4j+b 为第 j 个 S 盒的第 b 位，连线把局部输入比特 i 移到 wiring[i]
         """
-        self.create_objective_function()
-        self.constraint()
-        self.init()
-        self.variable_binary()
+        wiring = []
+        for i in range(16):
+            g = Gift.P_BOX[16 * q + i]
+            wiring.append(4 * ((g // 4 - q) // 4) + g % 4)
+        return wiring
 
-    def solve_model(self):
+    def init_super_sbox(self):
         """
-        求解 MILP 模型，搜索 Gift 算法的积分区分器（Integral Distinguisher）。
+        超级 S 盒模式下的初始约束：由初始分割属性直接求出每个超级 S 盒两轮后可达的输出集合，
+        并用不等式把第 2 轮的状态限制在该集合中。
         """
-        # 记录开始时间
-        time_start = time.time()
-        balance_count = 0  # 平衡比特计数
-        # 初始化平衡位列表，初始时每个比特位为未知状态 "?"
-        balanced_bits = ["?" for i in range(64)]
-        balanced_flag = False  # 用于标记是否找到积分区分器
-
-        # 读取 MILP 模型文件
-        m = read(self.model_file_name)
-
-        # 如果启用暴力破解（brute_force_flag 为 '1'），则关闭输出
-        if (self.brute_force_flag == '1'):
-            m.setParam("OutputFlag", 0)
-
-        # 获取模型的目标函数
-        obj = m.getObjective()
-
-        # 遍历每个比特位，进行求解
-        for i in range(0, self.blocksize):
-            # 初始化一个长度为 64 的零列表，表示比特位约束
-            mask = [0 for j in range(64)]
-            # 设置当前比特位为 1
-            mask[i] = 1
-
-            # 添加临时约束，目标函数的变量值与 mask 中相应位置的值一致
-            temporary_constraints = m.addConstrs(
-                (obj.getVar(j) == mask[j] for j in range(64)), name='temp_constraints')
-
-            # 对模型进行优化求解
-            m.optimize()
-
-            # 如果找到可行解（状态为 3），说明找到了平衡比特位
-            if m.Status == 3:
-                balanced_flag = True
-                # 设置当前比特位为 "b"（表示该比特位平衡）
-                balanced_bits[63 - i] = "b"     #xi = x[63-i]  倒序阅读，所以第一个变量 x0 在数组中为最后一个元素 x[63]
-                balance_count += 1
-            # 移除临时约束
-            m.remove(temporary_constraints)
-            m.update()
-
-        # 打开结果文件进行写入
-        fileobj = open(self.result_file_name, "a")
-        fileobj.write(f"轮数为: {self.round}\n")
-        # 根据是否找到积分区分器，写入相应的信息
-        new_constant_bits = [x + 1 for x in self.constant_bits]  # constant_bits存储的是索引，因为索引是从零开始，不易阅读，因此加1，符合阅读习惯
-        if balanced_flag:
-            fileobj.write("常量比特位: %s \n" %
-                          ",".join(map(str, new_constant_bits)))
-            fileobj.write("存在积分区分器\n")
-            print("\n常量比特位: %s" %
-                  ",".join(map(str, new_constant_bits)))
-            print("存在积分区分器")
-        else:
-            fileobj.write("常量比特位为: %s\n" %
-                          ",".join(map(str, new_constant_bits)))
-            fileobj.write("不存在积分区分器\n")
-            print("\n常量比特位为: %s" %
-                  ",".join(map(str, new_constant_bits)))
-            print("不存在积分区分器")
-
-        input_array = ['a'] * 64
-        # 更新 input_array，根据 constant_bits 中的索引将元素修改为 'c'
-
-        for index in self.constant_bits:
-            input_array[63 - index] = 'c'    #xi = x[63-i]  倒序阅读，所以第一个变量 x0 在数组中为最后一个元素 x[63]
-        # 输入
-
-        input_array = ["".join(input_array[4 * i: 4 * i + 4])
-                       for i in range(16)]
-        fileobj.write("输入为: %s\n" % " ".join(input_array))
-
-        # 打印整个 input_array
-        print("输入为:" + " ".join(input_array))
-        # 将平衡比特位的状态按 4 个比特一组进行输出
-
-        # 输出
-        output_state = ["".join(balanced_bits[4 * i: 4 * i + 4])
-                        for i in range(16)]
-        fileobj.write("输出为: %s" % " ".join(output_state))
-        print("输出为:" + " ".join(output_state))
-        fileobj.write(f"\n平衡比特数量：{balance_count}")
-        print(f"平衡比特数量：{balance_count}")
-        # 记录结束时间并计算算法运行时间
-        time_end = time.time()
-        elapsed_time = time_end - time_start
-        fileobj.write("\n用时为 = %.2f\n\n" % elapsed_time)
-        print("用时为 = %.2f\n" % elapsed_time)
-
-        # 关闭结果文件
-        fileobj.close()
\ No newline at end of file
+        if SBOX_DIR not in sys.path:
+            sys.path.append(SBOX_DIR)
+        from supersbox import TrailTable, ComposeLayers, ReachableInequalities
+        if not hasattr(self, "trail_table"):
+            points = [[(x >> (7 - c)) & 1 for c in range(8)] for x in range(256)]
+            points = [p for p in points if all(sum(a * b for a, b in zip(p, coff)) + coff[8] >= 0 for coff in self.S_T)]
+            self.trail_table = TrailTable(points, 4)
+        # x_0_k 为常量当且仅当 63 - k 在 constant_bits 中
+        active = [0 if 63 - k in self.constant_bits else 1 for k in range(64)]
+        output_state = self.state(2, "x")
+        for q in range(4):
+            inputs = [sum(active[4 * (4 * q + j) + b] << b for b in range(4)) for j in range(4)]
+            key = (q, tuple(inputs))
+            if key not in self.super_inequalities:
+                reachable = ComposeLayers(self.trail_table, inputs, Gift.super_sbox_wiring(q))
+                self.super_inequalities[key] = ReachableInequalities(reachable)
+            # 第 c 个坐标为局部比特 15 - c，即第二轮 S 盒 q + 4t 的第 b 位
+            bits = []
+            for c in range(16):
+                t, b = divmod(15 - c, 4)
+                bits.append(output_state[4 * (q + 4 * t) + b])
+            inequalities = self.super_inequalities[key]
+            if inequalities:
+                self.assembler.AddBlock([coff[:16] for coff in inequalities], [bits] * len(inequalities), ">=",
+                                        [-coff[16] for coff in inequalities])
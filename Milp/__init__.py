@@ -0,0 +1,6 @@
+from .assembler import ModelAssembler
+from .components import Component, Sbox, COPY, XOR, AND, Permute
+from .writer import ModelWriter, MPSWriter
+from .registry import VariableRegistry
+from .presolve import Presolve
+from .engine import CipherModel, derive_inequalities, SBOX_DIR
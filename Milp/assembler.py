@@ -0,0 +1,271 @@
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+from gurobipy import GRB
+
+from .presolve import Presolve
+from .registry import VariableRegistry
+from .writer import ModelWriter, MPSWriter
+
+# 约束方向，与 Gurobi 的 addMConstr 相同
+SENSES = {">": ">", ">=": ">", "<": "<", "<=": "<", "=": "="}
+
+
+class ModelAssembler:
+    # 在内存中按块收集 0/1 变量上的线性约束，每块为同一个系数模板作用在若干组变量上，
+    # 最后一次性组装成稀疏矩阵交给求解器，不经过 LP 文件。变量由 VariableRegistry 按组分配整数编号，
+    # 变量名只在导出模型时生成。presolve 为 True 时每次求解前先做结构预处理（见 Milp/presolve.py），
+    # 求解器得到的是代入固定变量后缩小的模型
+    def __init__(self, presolve=False):
+        self.presolve = presolve
+        self.presolve_structure = None  # 代入中间变量后的模型及其对应的 (块数, 变量数, 受保护变量)
+        self.presolve_report = None  # 最近一次预处理前后的模型大小
+        self.registry = VariableRegistry()
+        self.blocks = []  # (系数, 变量编号, 方向, 右端项)
+        self.objective = []  # 目标函数中的变量编号，按顺序
+        self.fixed = {}  # 取值固定的变量：编号 -> 取值，以变量上下界的形式交给求解器
+        self.solver = None  # 已载入求解器的模型，见 Solver
+        self.solver_fixed = {}  # 已在 self.solver 中固定的变量
+        self.solver_variables = 0  # 已载入 self.solver 的变量数
+        self.solver_blocks = 0  # 已载入 self.solver 的约束块数
+        self.solver_objective = []  # self.solver 当前的目标函数
+        self.solver_vars = []  # self.solver 的变量，下标即变量编号
+
+    @property
+    def NumVariables(self):
+        return self.registry.count
+
+    @property
+    def names(self):
+        """
+        Variable names in id order, generated on every access (for export only)
+        """
+        return self.registry.Names()
+
+    def Group(self, prefix, round, shape):
+        """
+        Return the ids of the variable group (prefix, round) with the given shape, see VariableRegistry.Group
+        """
+        return self.registry.Group(prefix, round, shape)
+
+    def State(self, prefix, round):
+        """
+        Return the ids of a registered group, e.g. the round-r state bits
+        """
+        return self.registry.State(prefix, round)
+
+    def Variables(self, names):
+        """
+        Return the ids of the given variable names as an integer array of the same shape; names that are not
+        names of registered variables become single variables
+        """
+        return self.registry.Lookup(names)
+
+    def AddBlock(self, coefficients, variables, sense, rhs):
+        """
+        Add one row per row of variables (names or ids, shape k x m): sum_j coefficients[j] * variables[i][j]
+        (sense) rhs[i]. coefficients has shape m, or k x m for a row-wise coefficient matrix, and rhs is a
+        scalar or has shape k
+        """
+        variables = np.asarray(variables)
+        if variables.dtype.kind not in "iu":
+            variables = self.Variables(variables)
+        variables = variables.reshape(len(variables), -1)
+        coefficients = np.broadcast_to(np.asarray(coefficients, dtype=np.float64), variables.shape)
+        rhs = np.broadcast_to(np.asarray(rhs, dtype=np.float64), (len(variables),))
+        self.blocks.append((coefficients, variables, SENSES[sense], rhs))
+
+    def SetObjective(self, variables):
+        """
+        Minimize the sum of the given variables; the order is kept, so that obj.getVar(i) is variables[i]
+        """
+        variables = np.asarray(variables)
+        if variables.dtype.kind not in "iu":
+            variables = self.Variables(variables)
+        self.objective = variables.reshape(-1).tolist()
+
+    def SetFixed(self, variables, values):
+        """
+        Fix the given variables to the given values (through their bounds, not through rows); variables fixed
+        by an earlier call become free again. Only the bounds change in a model already built by Solver
+        """
+        variables = np.asarray(variables)
+        if variables.dtype.kind not in "iu":
+            variables = self.Variables(variables)
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), variables.reshape(-1).shape)
+        self.fixed = dict(zip(variables.reshape(-1).tolist(), values.tolist()))
+
+    @property
+    def NumRows(self):
+        return sum(len(block[1]) for block in self.blocks)
+
+    def Matrix(self, first=0):
+        """
+        Return (A, sense, rhs) with A a CSR matrix over all rows of the blocks from block `first` on, zero
+        coefficients dropped
+        """
+        rows, cols, data, senses, rhs = [], [], [], [], []
+        start = 0
+        for coefficients, variables, sense, b in self.blocks[first:]:
+            k, m = variables.shape
+            rows.append(np.repeat(np.arange(start, start + k), m))
+            cols.append(variables.reshape(-1))
+            data.append(coefficients.reshape(-1))
+            senses.append(np.full(k, sense))
+            rhs.append(b)
+            start += k
+        if start == 0:
+            return sp.csr_matrix((0, self.NumVariables)), np.array([], dtype="<U1"), np.array([])
+        A = sp.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                          shape=(start, self.NumVariables))
+        A.eliminate_zeros()
+        return A, np.concatenate(senses), np.concatenate(rhs)
+
+    def ToGurobi(self, name="model"):
+        """
+        Build the Gurobi model: all variables binary, all blocks added with one addMConstr call
+        """
+        m = gp.Model(name)
+        x = m.addMVar(self.NumVariables, vtype=GRB.BINARY)
+        A, sense, rhs = self.Matrix()
+        if A.shape[0] > 0:
+            m.addMConstr(A, x, sense, rhs)
+        if self.fixed:
+            ids = np.fromiter(self.fixed.keys(), dtype=np.int64)
+            values = np.fromiter(self.fixed.values(), dtype=np.float64)
+            x[ids].lb = values
+            x[ids].ub = values
+        variables = x.tolist()
+        m.setObjective(gp.LinExpr([1.0] * len(self.objective), [variables[i] for i in self.objective]),
+                       GRB.MINIMIZE)
+        m.update()
+        return m
+
+    def Solver(self, name="model"):
+        """
+        Return the Gurobi model of this assembler, built on the first call and reused afterwards: later calls
+        only add the variables and blocks added since the previous call, replace the objective if it changed
+        and update the bounds of the fixed variables (see SetFixed). The solver variables carry no names.
+        With presolve a smaller model is built on every call instead, see PresolvedSolver
+        """
+        if self.presolve:
+            return self.PresolvedSolver(name)
+        if self.solver is None:
+            self.solver = self.ToGurobi(name)
+            self.solver_fixed = dict(self.fixed)
+            self.solver_variables = self.NumVariables
+            self.solver_blocks = len(self.blocks)
+            self.solver_objective = list(self.objective)
+            self.solver_vars = self.solver.getVars()
+            return self.solver
+        m = self.solver
+        # 新增的变量和约束块追加到已有模型之后，变量编号与 getVars 的下标保持一致
+        if self.NumVariables > self.solver_variables:
+            m.addMVar(self.NumVariables - self.solver_variables, vtype=GRB.BINARY)
+            self.solver_variables = self.NumVariables
+            m.update()
+            self.solver_vars = m.getVars()
+        variables = self.solver_vars
+        if len(self.blocks) > self.solver_blocks:
+            A, sense, rhs = self.Matrix(self.solver_blocks)
+            if A.shape[0] > 0:
+                m.addMConstr(A, gp.MVar.fromlist(variables), sense, rhs)
+            self.solver_blocks = len(self.blocks)
+        if self.objective != self.solver_objective:
+            m.setObjective(gp.LinExpr([1.0] * len(self.objective), [variables[i] for i in self.objective]),
+                           GRB.MINIMIZE)
+            self.solver_objective = list(self.objective)
+        for i in self.solver_fixed:
+            if i not in self.fixed:
+                variables[i].lb = 0
+                variables[i].ub = 1
+        for i, value in self.fixed.items():
+            variables[i].lb = value
+            variables[i].ub = value
+        self.solver_fixed = dict(self.fixed)
+        m.update()
+        return m
+
+    def PresolvedSolver(self, name="model"):
+        """
+        Build the Gurobi model of the presolved model: intermediate variables are substituted once per model
+        structure, then the fixed values of this call are propagated. The objective variables are always
+        kept, so SolverVariables works for them; eliminated variables have no solver variable
+        """
+        protected = set(self.objective) | set(self.fixed)
+        key = (len(self.blocks), self.NumVariables, frozenset(protected))
+        if self.presolve_structure is None or self.presolve_structure[1] != key:
+            A, sense, rhs = self.Matrix()
+            structure = Presolve(A, sense, rhs, protected)
+            structure.Substitute()
+            self.presolve_structure = (structure, key)
+        presolve = self.presolve_structure[0].Copy()
+        lb, ub = presolve.Propagate(self.fixed, self.objective)
+        A, sense, rhs, columns, lb, ub = presolve.Model(lb, ub)
+        self.presolve_report = presolve.Report()
+        if self.solver is not None:
+            self.solver.dispose()
+        m = gp.Model(name)
+        x = m.addMVar(len(columns), lb=lb, ub=ub, vtype=GRB.BINARY)
+        if A.shape[0] > 0:
+            m.addMConstr(A, x, sense, rhs)
+        variables = x.tolist()
+        self.solver_vars = [None] * self.NumVariables
+        for i, j in enumerate(columns):
+            self.solver_vars[j] = variables[i]
+        m.setObjective(gp.LinExpr([1.0] * len(self.objective), [self.solver_vars[i] for i in self.objective]),
+                       GRB.MINIMIZE)
+        m.update()
+        self.solver = m
+        return m
+
+    def SolverVariables(self, variables):
+        """
+        Return the Gurobi variables of the given ids (any shape, flattened) in the model built by Solver
+        """
+        return [self.solver_vars[i] for i in np.asarray(variables).reshape(-1).tolist()]
+
+    def WriteLP(self, filename=None):
+        """
+        Export the model as an LP file through one buffered ModelWriter (optional, the solver does not need
+        it). With filename None the LP text is returned instead
+        """
+        names = np.asarray(self.registry.Names(), dtype=object)
+        with ModelWriter(filename) as writer:
+            writer.WriteObjective(names[self.objective].tolist())
+            writer.BeginConstraints()
+            for coefficients, variables, sense, rhs in self.blocks:
+                writer.WriteRows(coefficients, names[variables], sense, rhs)
+            writer.WriteBounds(names[list(self.fixed.keys())].tolist(), list(self.fixed.values()))
+            writer.WriteBinaries(names.tolist())
+            if filename is None:
+                return writer.Text()
+
+    def WriteMPS(self, filename=None, free=True, name="model"):
+        """
+        Export the model as a free (or, with free False, fixed) MPS file; rows are named R0, R1, ... in order.
+        With filename None the MPS text is returned instead
+        """
+        A, senses, rhs = self.Matrix()
+        rows = ["R%d" % i for i in range(A.shape[0])]
+        with MPSWriter(filename, free) as writer:
+            writer.WriteHeader(name, senses.tolist(), rows)
+            names = self.registry.Names()
+            writer.WriteColumns(names, A.tocsc(), rows, self.objective)
+            writer.WriteRHS(rows, rhs.tolist())
+            writer.WriteBinaryBounds(names, self.fixed)
+            if filename is None:
+                return writer.Text()
+
+    def Write(self, filename):
+        """
+        Export the model in the format given by the file extension: .lp or .mps (free MPS), each optionally
+        followed by .gz for a gzip-compressed file
+        """
+        extension = filename[:-3] if filename.endswith(".gz") else filename
+        if extension.endswith(".lp"):
+            self.WriteLP(filename)
+        elif extension.endswith(".mps"):
+            self.WriteMPS(filename)
+        else:
+            raise ValueError("unknown model format: %s" % filename)
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class Component:
+    # 部件模板：r 行约束的系数模板 (r x m) 与槽位下标 (r x m)。部件的一个实例由各槽位上的变量给出，
+    # k 个实例的变量矩阵 (k x 槽位数) 按槽位下标取出即为全部 k * r 行，行按实例在外、模板行在内排列
+    def __init__(self, coefficients, slots, sense, rhs):
+        self.coefficients = np.atleast_2d(np.asarray(coefficients, dtype=np.float64))
+        self.slots = np.broadcast_to(np.asarray(slots, dtype=np.int64), self.coefficients.shape)
+        self.sense = sense
+        self.rhs = np.broadcast_to(np.asarray(rhs, dtype=np.float64), (len(self.coefficients),))
+
+    def Emit(self, assembler, variables):
+        """
+        Add the rows of all instances to the assembler as one block; variables (names or ids) has one row per
+        instance and one column per slot
+        """
+        variables = np.asarray(variables)
+        variables = variables.reshape(len(variables), -1)
+        rows = variables[:, self.slots].reshape(-1, self.slots.shape[1])
+        count = len(variables)
+        assembler.AddBlock(np.tile(self.coefficients, (count, 1)), rows, self.sense, np.tile(self.rhs, count))
+
+
+def Sbox(inequalities):
+    """
+    Return the component of an sbox described by inequalities a.x + b >= 0, one slot per coefficient
+    """
+    inequalities = np.asarray(inequalities, dtype=np.float64)
+    size = inequalities.shape[1] - 1
+    return Component(inequalities[:, :-1], np.arange(size), ">=", -inequalities[:, -1])
+
+
+# 复制 x -> (y, z)：x - y - z = 0，槽位依次为 x, y, z
+COPY = Component([1, -1, -1], [0, 1, 2], "=", 0)
+
+# 异或 (x, y) -> z：z - x - y = 0，槽位依次为 x, y, z，每行的变量顺序为 z, x, y
+XOR = Component([1, -1, -1], [2, 0, 1], "=", 0)
+
+# 与 (x, y) -> z：z - x >= 0, z - y >= 0, x + y - z >= 0，槽位依次为 x, y, z
+AND = Component([[1, -1, 0], [1, 0, -1], [-1, 1, 1]], [2, 0, 1], ">=", 0)
+
+
+def Permute(variables, permutation):
+    """
+    Apply a bit permutation along the last axis: the variable at position i moves to position permutation[i]
+    """
+    variables = np.asarray(variables)
+    result = np.empty_like(variables)
+    result[..., permutation] = variables
+    return result
@@ -0,0 +1,530 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .assembler import ModelAssembler
+from .components import Sbox, COPY, XOR, AND, Permute
+
+# S 盒分析流程所在目录，用于从 S 盒自动推导不等式
+SBOX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Sbox")
+
+# 已推导的 S 盒不等式，按 (S 盒, 生成参数) 缓存在进程内，磁盘缓存见 Sbox/cache.py
+_derived_inequalities = {}
+
+
+def derive_inequalities(sbox, settings=None):
+    """
+    从 S 盒表推导约简后的线性不等式，结果缓存在内存和磁盘中。
+
+    参数:
+        sbox (list): S 盒表
+        settings (dict): 生成参数，见 Sbox/cache.py 中的 DEFAULT_SETTINGS
+    返回:
+        list: 不等式列表，每一行为 2n 个系数加常数项
+    """
+    key = (tuple(sbox), json.dumps(settings or {}, sort_keys=True))
+    if key not in _derived_inequalities:
+        if SBOX_DIR not in sys.path:
+            sys.path.append(SBOX_DIR)
+        from cache import LookupInequalities
+        _derived_inequalities[key] = LookupInequalities(sbox, settings)
+    return _derived_inequalities[key]
+
+
+# 生成约束的操作及其部件模板，sbox 的模板由密码的 S 盒不等式给出
+COMPONENTS = {"copy": COPY, "xor": XOR, "and": AND}
+
+# 线性层不等式的默认生成参数：坐标多于 8 个时凸包不可行，改用不可能子立方体
+LINEAR_SETTINGS = {"generator": "cubes"}
+
+# 已生成的线性层部件模板，按 (矩阵, 生成参数) 缓存在进程内
+_linear_templates = {}
+
+
+def matrix_table(matrix):
+    """
+    返回 n x n 二元矩阵 M 作为 n 比特 S 盒的查找表：输入 x 的第 j 个坐标（最高位为第 0 个）为 x_j，
+    输出的第 i 个坐标为 M[i] 与 x 的内积。
+
+    参数:
+        matrix (list): 二元矩阵，matrix[i][j] 为 1 时输出 i 依赖于输入 j
+    返回:
+        list: 查找表
+    """
+    n = len(matrix)
+    table = []
+    for x in range(1 << n):
+        bits = [(x >> (n - 1 - j)) & 1 for j in range(n)]
+        y = 0
+        for i in range(n):
+            y |= (sum(matrix[i][j] & bits[j] for j in range(n)) & 1) << (n - 1 - i)
+        table.append(y)
+    return table
+
+
+def linear_template(matrix, settings=None):
+    """
+    返回二元矩阵所描述的线性层的部件模板：把整个矩阵看作一个 S 盒，用其分割轨迹的不等式一次描述，
+    不需要复制和异或的中间变量。槽位依次为 n 个输入和 n 个输出
+
+    参数:
+        matrix (list): 二元矩阵
+        settings (dict): 可选，推导不等式时的生成参数，默认为 LINEAR_SETTINGS
+    返回:
+        Component: 部件模板
+    """
+    settings = settings or LINEAR_SETTINGS
+    key = (json.dumps([list(map(int, row)) for row in matrix]), json.dumps(settings, sort_keys=True))
+    if key not in _linear_templates:
+        _linear_templates[key] = Sbox(derive_inequalities(matrix_table(matrix), settings))
+    return _linear_templates[key]
+
+
+class CipherModel:
+    # 由密码描述生成 MILP 模型，搜索积分区分器。描述是一个字典：
+    #   name        名字，用于模型文件名和结果文件名
+    #   blocksize   分组长度
+    #   state       轮与轮之间传递的寄存器及其形状，如 {"x": (8, 4), "y": (8, 4)}
+    #   temporary   轮内的中间寄存器及其形状
+    #   input       依次拼接成输入状态的寄存器，第 i 个常量比特为拼接后的第 blocksize - 1 - i 个变量
+    #   output      依次拼接成输出状态（目标函数）的寄存器
+    #   round       一轮的操作序列，见 constraint_round
+    #   inequalities  可选，S 盒不等式，每行为系数加常数项（a.x + b >= 0）
+    #   solve       "unit"：逐个输出比特检验是否平衡；"zeroing"：逐个排除不平衡的比特
+    #   descending  可选，为 True 时自动搜索从最后一组连续常量比特开始
+    # 寄存器 s 在第 n 轮的变量为 s_n_...；state 中的寄存器在一轮中被写入时得到第 n + 1 轮的变量
+    def __init__(self, round, description, inequalities=None, export_lp=False, model_format="lp", presolve=False):
+        """
+        参数:
+            round (int): 轮数
+            description (dict): 密码描述
+            inequalities (list): 可选，S 盒不等式，优先于描述中给出的不等式
+            export_lp (bool): 可选，为 True 时把模型另外导出为模型文件，求解本身不需要该文件
+            model_format (str): 可选，导出的模型文件格式，"lp" 或 "mps"，加上 ".gz" 时压缩
+            presolve (bool): 可选，为 True 时每次求解前先消去中间变量、代入常量比特，把缩小的模型交给求解器
+        """
+        self.description = description
+        self.name = description["name"]
+        self.blocksize = description["blocksize"]
+        self.shapes = dict(description.get("temporary", {}))
+        self.shapes.update(description["state"])
+        self.export_lp = export_lp
+        self.model_format = model_format
+        self.presolve = presolve
+        self.brute_force_flag = '0'
+        # 模型组装器及其对应的轮数：轮结构只生成一次，之后只修改第 0 轮变量的取值，轮数增加时只追加新的轮
+        self.assembler = None
+        self.assembler_round = None
+        # 从第几轮开始生成轮约束（此前的轮由 init 中的约束给出），以及是否每次都重新生成模型
+        self.first_round = 0
+        self.rebuild_model = False
+
+        if inequalities is None:
+            inequalities = description.get("inequalities")
+        # S 盒不等式的部件模板，见 Milp/components.py
+        self.sbox_template = Sbox(inequalities) if inequalities is not None else None
+
+        # 确保 "model" 文件夹存在，不存在则创建
+        os.makedirs("./model", exist_ok=True)
+        # 确保 "result" 文件夹存在，不存在则创建
+        os.makedirs("./result", exist_ok=True)
+
+        self.set_round(round)
+
+    def set_round(self, round):
+        """
+        设置轮数及对应的模型文件名和结果文件名。已生成的模型在下一次 make_model 时逐轮扩展到新的轮数，
+        不重新生成前面的轮。
+
+        参数:
+            round (int): 轮数
+        """
+        self.round = round
+        # 设置导出的 MILP 模型的文件名，模型文件存放路径为 "model" 文件夹
+        self.model_file_name = "./model/%s_round%d.%s" % (self.name, self.round, self.model_format)
+        # 设置结果文件的文件名，存放路径为 "result" 文件夹
+        self.result_file_name = "./result/%s_round%d_result.txt" % (self.name, self.round)
+
+        # 创建并立即关闭结果文件，确保文件存在
+        with open(self.result_file_name, "w") as fileobj:
+            pass
+
+    def generate_continuous_arrays(self, n):
+        """
+        生成长度为 n 的所有连续常量比特数组（0 到 blocksize - 1 之间），描述中 descending 为 True 时按降序排列。
+
+        参数:
+            n (int): 数组的长度
+        返回:
+            list: 所有可能的连续数组的列表
+        """
+        if n > self.blocksize:
+            raise ValueError(f"数组长度不能大于分组长度（{self.blocksize}）")
+        arrays = [list(range(i, i + n)) for i in range(0, self.blocksize - n + 1)]
+        if self.description.get("descending", False):
+            arrays.reverse()
+        return arrays
+
+    def set_constant_bits(self):
+        """
+        设置常量比特位（constant_bits），这些比特位将用于后续的算法求解。
+        """
+        if self.brute_force_flag in ['0', '2']:  # 如果选择了探测特定情况（0）或逐轮搜索（2）
+            temp = input("请输入常数的位置（请用空格分隔）:\n")  # 询问用户输入常量位的列表
+            temp = temp.split()  # 将输入的字符串分割为一个列表
+            constant_bits = []  # 创建一个空列表，用来存储常量位
+            for element in temp:  # 遍历列表中的每个元素
+                constant_bits.append(int(element) - 1)  # 将元素转换为整数并添加到常量位列表中，作为常数项的索引
+            # 因为数组下标从零开始，所以要减1
+            if (len(constant_bits) > self.blocksize):
+                raise ValueError(f"数组长度不能大于分组长度（{self.blocksize}）")  # 检查输入是否有效
+            for index in constant_bits:
+                if index > self.blocksize:
+                    raise ValueError(f"常数比特位置不能大于分组长度（{self.blocksize}）")  # 检查输入是否有效
+            self.constant_bits = constant_bits
+            if self.brute_force_flag == '2':  # 从最少的轮数起逐轮增加到目标轮数
+                rounds = self.search_rounds(max(1, self.first_round), self.round)
+                print("存在积分区分器的最大轮数: %s" % rounds)
+            else:
+                self.make_model()  # 调用make_model方法生成模型
+                self.solve_model()  # 调用solve_model方法求解模型
+
+        else:  # 如果选择了暴力破解（1）
+            # 用户输入数组的长度
+            n = int(input("请输入数组的长度："))
+            # 生成并打印连续的数组
+            arrays = self.generate_continuous_arrays(n)
+            for i in range(len(arrays)):  # 遍历所有可能的常量位
+                print("%d / %d" % (i + 1, len(arrays)))  # 输出当前进度
+                self.constant_bits = arrays[i]  # 将当前的常量位i作为列表传入
+                self.make_model()  # 调用make_model方法生成模型
+                self.solve_model()  # 调用solve_model方法求解模型
+
+    def set_brute_force_flag(self, brute_force_flag):
+        """
+        设置是否进行暴力破解的标志。
+
+        参数:
+            brute_force_flag (str): '0' 表示不进行暴力破解，'1' 表示进行暴力破解，'2' 表示对给定的常量比特逐轮搜索
+        """
+        self.brute_force_flag = brute_force_flag
+
+    def state(self, n, s):
+        """
+        返回第 n 轮寄存器 s 的变量编号（形状见描述），首次使用时在模型中登记；下标 [i][j] 对应变量 s_n_i_j。
+
+        参数:
+            n (int): 轮数
+            s (str): 寄存器名
+        返回:
+            numpy.ndarray: 变量编号
+        """
+        return self.assembler.Group(s, n, self.shapes[s])
+
+    def registers(self, n, names):
+        """
+        返回第 n 轮的若干寄存器依次拼接成的一维变量编号数组
+        """
+        return np.concatenate([self.state(n, s).reshape(-1) for s in names])
+
+    def create_objective_function(self):
+        """
+        创建 MILP 模型的目标函数：输出状态所有变量之和最小。
+        """
+        self.assembler.SetObjective(self.registers(self.round, self.description["output"]))
+
+    def constraint(self):
+        """
+            按照描述中的轮操作序列，逐轮生成约束
+        """
+        assert (self.round >= 1 and self.round >= self.first_round)
+        for i in range(self.first_round, self.round):
+            self.constraint_round(i)
+
+    def constraint_round(self, i):
+        """
+        生成第 i 轮的约束。描述中的每个操作为一个元组，最后可以附带选项字典（from_round: 从第几轮起才执行）：
+            ("sbox", in, out, n[, reverse])   n 比特 S 盒层，in 按行每 n 比特为一个 S 盒，reverse 时 S 盒内比特倒序
+            ("copy", in, out1, out2)          复制
+            ("xor", in1, in2, out)            异或
+            ("and", in1, in2, out)            与
+            ("linear", in, out, matrix)       二元矩阵线性层：in 按第一维分为 n 个分量，out 的第 i 个分量为
+                                              matrix[i] 选中的输入分量的异或，其余维为并行的比特，见 linear_template
+            ("permute", s, table)             比特置换：第 i 个位置移到 table[i]
+            ("rotate", s, n)                  循环移位：新的第 j 个位置为原来的第 j - n 个位置
+            ("shuffle", s, order)             按第一维重排：新的第 k 行为原来的第 order[k] 行
+        寄存器可以写为名字或 (名字, 下标)。读取 state 中的寄存器得到本轮的输入（经过本轮之前的置换等），
+        写入 state 中的寄存器得到第 i + 1 轮的变量。连续的同一种操作合并为一块约束。
+
+        参数:
+            i (int): 轮的编号，从 0 开始
+        """
+        values = {}  # 本轮中各寄存器当前对应的变量编号
+        pending = []  # 尚未加入模型的同一种部件的实例
+        # 先按描述中的顺序登记本轮的全部变量，使变量编号与操作的写法无关
+        for n, names in ((i, self.description["state"]), (i, self.description.get("temporary", {})),
+                         (i + 1, self.description["state"])):
+            for name in names:
+                self.state(n, name)
+
+        def register(name):
+            if name not in values:
+                values[name] = self.state(i, name)
+            return values[name]
+
+        def read(reference):
+            if isinstance(reference, tuple):
+                return register(reference[0])[reference[1]]
+            return register(reference)
+
+        def write(reference):
+            name, index = reference if isinstance(reference, tuple) else (reference, None)
+            variables = self.state(i + 1, name) if name in self.description["state"] else register(name)
+            return variables if index is None else variables[index]
+
+        def emit(component, instances):
+            if pending and pending[-1][0] is not component:
+                flush()
+            pending.append((component, instances))
+
+        def flush():
+            if pending:
+                pending[0][0].Emit(self.assembler, np.concatenate([rows for _, rows in pending]))
+                pending.clear()
+
+        for operation in self.description["round"]:
+            options = {}
+            if isinstance(operation[-1], dict):
+                operation, options = operation[:-1], operation[-1]
+            if i < options.get("from_round", 0):
+                continue
+            kind = operation[0]
+            if kind == "sbox":
+                size = operation[3]
+                reverse = len(operation) > 4 and operation[4]
+                step = -1 if reverse else 1
+                inputs = read(operation[1]).reshape(-1, size)[:, ::step]
+                outputs = write(operation[2]).reshape(-1, size)[:, ::step]
+                emit(self.sbox_template, np.concatenate([inputs, outputs], axis=1))
+            elif kind == "linear":
+                size = len(operation[3])
+                inputs = read(operation[1]).reshape(size, -1).T
+                outputs = write(operation[2]).reshape(size, -1).T
+                emit(linear_template(operation[3]), np.concatenate([inputs, outputs], axis=1))
+            elif kind == "copy":
+                emit(COPY, np.stack([read(operation[1]), write(operation[2]), write(operation[3])], axis=-1).reshape(-1, 3))
+            elif kind in COMPONENTS:
+                emit(COMPONENTS[kind], np.stack([read(operation[1]), read(operation[2]), write(operation[3])],
+                                                axis=-1).reshape(-1, 3))
+            elif kind == "permute":
+                values[operation[1]] = Permute(read(operation[1]), operation[2])
+            elif kind == "rotate":
+                values[operation[1]] = np.roll(read(operation[1]), operation[2], axis=-1)
+            elif kind == "shuffle":
+                values[operation[1]] = read(operation[1])[list(operation[2])]
+            else:
+                raise ValueError("unknown operation %s" % kind)
+        flush()
+
+    def variable_binary(self):
+        """
+        在模型中登记各轮的状态变量，模型组装器中的变量都是二进制变量
+        """
+        for i in range(self.first_round, self.round + 1):
+            self.registers(i, self.description["state"])
+
+    def init(self):
+        """
+        生成由初始分割属性引入的初始约束条件：第 0 轮变量的取值以上下界的形式给出，
+        因此更换常量比特时不需要重新生成模型。
+        """
+        input_state = self.registers(0, self.description["input"])
+        rows = []  # 初始化等式列表
+        values = []
+        for i in range(self.blocksize):  # 遍历输入状态的每个比特
+            rows.append([input_state[self.blocksize - 1 - i]])
+            # 如果是常量，设置为 0；如果是活跃比特，设置为 1
+            values.append(0 if i in self.constant_bits else 1)
+        self.assembler.SetFixed(rows, values)
+
+    def extend_model(self):
+        """
+        把已生成的 assembler_round 轮模型逐轮扩展到 self.round 轮：只追加新的轮的变量和约束，
+        并把目标函数移到新的输出上，前面的轮不重新生成
+        """
+        for i in range(self.assembler_round, self.round):
+            self.constraint_round(i)
+            self.registers(i + 1, self.description["state"])
+        self.assembler_round = self.round
+        self.create_objective_function()
+
+    def make_model(self):
+        """
+        生成MILP模型，保存在内存中的模型组装器里，需要时另外导出为模型文件
+        """
+        # 轮结构只与轮数有关，已生成时只需重新设置初始分割属性，轮数增加时只追加新的轮
+        if self.assembler is None or self.assembler_round > self.round or self.rebuild_model:
+            self.assembler = ModelAssembler(self.presolve)
+            self.assembler_round = self.round
+            self.create_objective_function()
+            self.constraint()
+            self.variable_binary()
+        elif self.assembler_round < self.round:
+            self.extend_model()
+        self.init()
+        if self.export_lp:
+            self.assembler.Write(self.model_file_name)
+
+    def solve_unit(self, m, output):
+        """
+        逐个输出比特求解：输出为第 i 个单位向量的模型不可行时该比特平衡。
+        返回 (是否存在积分区分器, 各比特状态, 平衡比特数)，比特状态按输出变量的逆序排列
+        """
+        balance_count = 0  # 平衡比特计数
+        # 初始化平衡位列表，初始时每个比特位为未知状态 "?"
+        balanced_bits = ["?" for i in range(self.blocksize)]
+        balanced_flag = False  # 用于标记是否找到积分区分器
+        for i in range(0, self.blocksize):
+            # 初始化一个零列表，表示比特位约束，并设置当前比特位为 1
+            mask = [0 for j in range(self.blocksize)]
+            mask[i] = 1
+            # 添加临时约束，输出变量的值与 mask 中相应位置的值一致
+            temporary_constraints = m.addConstrs(
+                (output[j] == mask[j] for j in range(self.blocksize)), name='temp_constraints')
+            m.optimize()
+            # 如果模型不可行（状态为 3），说明找到了平衡比特位
+            if m.Status == 3:
+                balanced_flag = True
+                balanced_bits[self.blocksize - 1 - i] = "b"  # 倒序阅读，第一个变量在数组中为最后一个元素
+                balance_count += 1
+            # 移除临时约束
+            m.remove(temporary_constraints)
+            m.update()
+        return balanced_flag, balanced_bits, balance_count
+
+    def solve_zeroing(self, m, output):
+        """
+        反复求解：目标值不超过 1 时把取 1 的输出比特记为不平衡并固定为 0，直到目标值大于 1 或模型不可行。
+        返回 (是否存在积分区分器, 各比特状态, 平衡比特数)，比特状态按输出变量的顺序排列
+        """
+        balance_count = self.blocksize  # 初始化平衡比特计数
+        balanced_bits = ["b" for i in range(self.blocksize)]
+        balanced_flag = False  # 用于标记是否找到积分区分器
+        counter = 0  # 初始化计数器
+        added = []  # 求解过程中添加的约束，求解结束后删除，使模型可以被下一组常量比特复用
+        while counter < self.blocksize:
+            m.optimize()  # 求解MILP模型
+            # Gurobi语法: m.Status == 2表示模型是可行的
+            if m.Status == 2:
+                if m.getObjective().getValue() > 1:  # 如果目标函数值大于1，说明已找到积分区分器
+                    balanced_flag = True
+                    break
+                # 否则，找到取 1 的未平衡比特位
+                for i in range(0, self.blocksize):
+                    u = output[i]
+                    if u.getAttr('x') == 1:
+                        balanced_bits[i] = "?"  # 设置对应比特位为 "?"，表示未平衡
+                        balance_count -= 1
+                        added.append(m.addConstr(u == 0))  # 为该变量添加约束，强制其值为0
+                        m.update()
+                        counter += 1
+                        break
+            # Gurobi语法: m.Status == 3表示模型是不可行的
+            elif m.Status == 3:
+                balanced_flag = True
+                break
+            else:
+                print("Unknown error!")  # 如果模型返回未知错误，打印错误信息
+        # 删除求解过程中添加的约束
+        m.remove(added)
+        m.update()
+        return balanced_flag, balanced_bits, balance_count
+
+    def solve_model(self):
+        """
+        求解 MILP 模型，搜索积分区分器，结果写入结果文件并打印。
+
+        返回:
+            bool: 是否存在积分区分器
+        """
+        time_start = time.time()  # 记录开始时间
+
+        # 由模型组装器生成 Gurobi 模型，同一轮数下只生成一次，之后只更新第 0 轮变量的上下界
+        m = self.assembler.Solver("%s_round%d" % (self.name, self.round))
+
+        # 如果启用暴力破解或逐轮搜索（brute_force_flag 为 '1' 或 '2'），则关闭输出
+        if (self.brute_force_flag != '0'):
+            m.setParam("OutputFlag", 0)
+        elif self.presolve:
+            print(self.assembler.presolve_report)  # 预处理前后的模型大小
+
+        # 输出状态的变量，与目标函数中变量的顺序相同
+        output = self.assembler.SolverVariables(self.assembler.objective)
+        if self.description["solve"] == "unit":
+            balanced_flag, balanced_bits, balance_count = self.solve_unit(m, output)
+        else:
+            balanced_flag, balanced_bits, balance_count = self.solve_zeroing(m, output)
+
+        # 打开结果文件进行写入
+        fileobj = open(self.result_file_name, "a")
+        fileobj.write(f"轮数为: {self.round}\n")
+        # 根据是否找到积分区分器，写入相应的信息
+        new_constant_bits = [x + 1 for x in self.constant_bits]  # constant_bits存储的是索引，因为索引是从零开始，不易阅读，因此加1，符合阅读习惯
+        if balanced_flag:
+            fileobj.write("常量比特位: %s \n" % ",".join(map(str, new_constant_bits)))
+            fileobj.write("存在积分区分器\n")
+            print("\n常量比特位: %s" % ",".join(map(str, new_constant_bits)))
+            print("存在积分区分器")
+        else:
+            fileobj.write("常量比特位为: %s\n" % ",".join(map(str, new_constant_bits)))
+            fileobj.write("不存在积分区分器\n")
+            print("\n常量比特位为: %s" % ",".join(map(str, new_constant_bits)))
+            print("不存在积分区分器")
+
+        # 输入：根据 constant_bits 中的索引将元素修改为 'c'，倒序阅读
+        input_array = ['a'] * self.blocksize
+        for index in self.constant_bits:
+            input_array[self.blocksize - 1 - index] = 'c'
+        # 按 4 个比特一组输出
+        groups = range(self.blocksize // 4)
+        input_array = ["".join(input_array[4 * i: 4 * i + 4]) for i in groups]
+        fileobj.write("输入为: %s\n" % " ".join(input_array))
+        print("输入为:" + " ".join(input_array))
+
+        # 输出
+        output_state = ["".join(balanced_bits[4 * i: 4 * i + 4]) for i in groups]
+        fileobj.write("输出为: %s" % " ".join(output_state))
+        print("输出为:" + " ".join(output_state))
+        fileobj.write(f"\n平衡比特数量：{balance_count}")
+        print(f"平衡比特数量：{balance_count}")
+        # 记录结束时间并计算算法运行时间
+        elapsed_time = time.time() - time_start
+        fileobj.write("\n用时为 = %.2f\n\n" % elapsed_time)
+        print("用时为 = %.2f\n" % elapsed_time)
+
+        # 关闭结果文件
+        fileobj.close()
+        return balanced_flag
+
+    def search_rounds(self, first_round, last_round):
+        """
+        对当前的常量比特从 first_round 轮起逐轮增加轮数并求解，直到 last_round 轮或某一轮不存在积分区分器。
+        模型只在第一轮生成一次，之后每轮只追加一轮（见 extend_model）。
+
+        参数:
+            first_round (int): 起始轮数
+            last_round (int): 最大轮数
+        返回:
+            int: 存在积分区分器的最大轮数，起始轮数就不存在时为 None
+        """
+        rounds = None
+        for r in range(first_round, last_round + 1):
+            self.set_round(r)
+            self.make_model()
+            if not self.solve_model():
+                break
+            rounds = r
+        return rounds
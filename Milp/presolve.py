@@ -0,0 +1,261 @@
+from collections import defaultdict
+
+import numpy as np
+import scipy.sparse as sp
+
+# 代入后一行最多保留的非零系数个数，超过时不代入，避免约束变稠密
+MAX_ROW_LENGTH = 8
+
+# 比较活动量与右端项时的容差
+EPSILON = 1e-9
+
+
+class Presolve:
+    # 0/1 模型的结构预处理，在交给求解器之前缩小模型，保持可行解在受保护变量上的取值集合不变：
+    #   Substitute  消去只出现在两行（或一行）中、且在某个系数为整数的等式中系数为 +-1 的中间变量，
+    #               例如复制 x - u - y = 0 之后只参与一次异或的 u；代入后由一行 u 的上下界代替原等式
+    #   Propagate   代入固定变量的取值，由约束推出其他变量的取值（如常量比特复制出的 0），删除已满足的约束
+    # 受保护的变量（目标函数中的变量和会被固定的变量）不会被 Substitute 消去，keep 中的变量（目标函数）
+    # 取值固定时也保留。所有约束都转换为 >= 和 = 两种方向
+    def __init__(self, A, senses, rhs, protected=()):
+        A = sp.csr_matrix(A)
+        self.variables = A.shape[1]
+        self.rows = []  # 每行为 {变量编号: 系数}，已删除的行为 None
+        self.senses = []  # ">" 或 "="
+        self.rhs = []
+        self.columns = defaultdict(set)  # 变量编号 -> 含有该变量的行
+        self.protected = set(protected)
+        self.removed = set()  # 已消去的变量
+        self.infeasible = False
+        for r in range(A.shape[0]):
+            start, end = A.indptr[r], A.indptr[r + 1]
+            row = dict(zip(A.indices[start:end].tolist(), A.data[start:end].tolist()))
+            b = float(rhs[r])
+            if senses[r] == "<":
+                row = {j: -a for j, a in row.items()}
+                b = -b
+            self.AddRow(row, "=" if senses[r] == "=" else ">", b)
+        self.before = self.Size()
+
+    def Copy(self):
+        """
+        Return an independent copy, e.g. of the substituted model before the fixed values of one probe are
+        propagated
+        """
+        other = Presolve.__new__(Presolve)
+        other.variables = self.variables
+        other.rows = [dict(row) if row is not None else None for row in self.rows]
+        other.senses = list(self.senses)
+        other.rhs = list(self.rhs)
+        other.columns = defaultdict(set, {j: set(rows) for j, rows in self.columns.items()})
+        other.protected = set(self.protected)
+        other.removed = set(self.removed)
+        other.infeasible = self.infeasible
+        other.before = self.before
+        return other
+
+    def AddRow(self, row, sense, rhs):
+        r = len(self.rows)
+        self.rows.append(row)
+        self.senses.append(sense)
+        self.rhs.append(rhs)
+        for j in row:
+            self.columns[j].add(r)
+        return r
+
+    def RemoveRow(self, r):
+        for j in self.rows[r]:
+            self.columns[j].discard(r)
+        self.rows[r] = None
+
+    def Size(self):
+        """
+        Return (rows, columns, nonzeros) of the current model
+        """
+        rows = [row for row in self.rows if row is not None]
+        return len(rows), self.variables - len(self.removed), sum(len(row) for row in rows)
+
+    def Report(self):
+        """
+        Return the sizes before and after presolve as one line
+        """
+        after = self.Size()
+        return "presolve: rows %d -> %d, columns %d -> %d, nonzeros %d -> %d" % (
+            self.before[0], after[0], self.before[1], after[1], self.before[2], after[2])
+
+    @staticmethod
+    def Activity(row, lb, ub):
+        """
+        Return the minimum and maximum of the row over the box [lb, ub]
+        """
+        low = high = 0.0
+        for j, a in row.items():
+            if a > 0:
+                low += a * lb[j]
+                high += a * ub[j]
+            else:
+                low += a * ub[j]
+                high += a * lb[j]
+        return low, high
+
+    def Substitute(self):
+        """
+        Eliminate intermediate variables through equalities, see the class comment; return the number of
+        eliminated variables
+        """
+        lb, ub = np.zeros(self.variables), np.ones(self.variables)
+        count = 0
+        # 每消去一个变量都可能使其他变量满足条件，重复到没有可消去的变量为止
+        while True:
+            eliminated = 0
+            for j in range(self.variables):
+                if j in self.protected or j in self.removed or not 1 <= len(self.columns[j]) <= 2:
+                    continue
+                for r in sorted(self.columns[j]):
+                    if self.Eliminate(j, r, lb, ub):
+                        eliminated += 1
+                        break
+            count += eliminated
+            if eliminated == 0:
+                return count
+
+    def Eliminate(self, j, r, lb, ub):
+        """
+        Eliminate variable j through equality row r if the model does not grow, return True on success
+        """
+        row = self.rows[r]
+        c = row[j]
+        if self.senses[r] != "=" or abs(c) != 1 or not all(float(a).is_integer() for a in row.values()):
+            return False
+        # x_j = (rhs - S) / c，其中 S 为其余各项之和；x_j 在 [0, 1] 中等价于 S 在 [low, high] 中
+        rest = {k: a for k, a in row.items() if k != j}
+        b = self.rhs[r]
+        low, high = (b - 1, b) if c > 0 else (b, b + 1)
+        minimum, maximum = self.Activity(rest, lb, ub)
+        bounds = []
+        if minimum < low - EPSILON:
+            bounds.append((dict(rest), ">", low))
+        if maximum > high + EPSILON:
+            bounds.append(({k: -a for k, a in rest.items()}, ">", -high))
+        if len(bounds) > 1:
+            return False
+        others = [s for s in self.columns[j] if s != r]
+        substituted = []
+        for s in others:
+            t = self.rows[s]
+            factor = t[j] / c
+            new = {k: a for k, a in t.items() if k != j}
+            for k, a in rest.items():
+                value = new.get(k, 0.0) - factor * a
+                if value == 0:
+                    new.pop(k, None)
+                else:
+                    new[k] = value
+            if len(new) > MAX_ROW_LENGTH:
+                return False
+            substituted.append((s, new, self.rhs[s] - factor * b))
+        for s, new, rhs in substituted:
+            sense = self.senses[s]
+            self.RemoveRow(s)
+            self.AddRow(new, sense, rhs)
+        self.RemoveRow(r)
+        for bound in bounds:
+            self.AddRow(*bound)
+        self.removed.add(j)
+        return True
+
+    def Propagate(self, fixed, keep=()):
+        """
+        Fix the given variables ({id: value}), propagate the bounds through the rows, then substitute all
+        fixed variables except those in keep (e.g. the objective) and drop the rows that became redundant.
+        Return (lb, ub) of all variables
+        """
+        keep = set(keep)
+        lb, ub = np.zeros(self.variables), np.ones(self.variables)
+        for j, value in fixed.items():
+            lb[j] = ub[j] = value
+        queue = [r for r, row in enumerate(self.rows) if row is not None]
+        queued = set(queue)
+        while queue and not self.infeasible:
+            r = queue.pop()
+            queued.discard(r)
+            if self.rows[r] is None:
+                continue
+            for j in self.Tighten(r, lb, ub):
+                for s in self.columns[j]:
+                    if s not in queued:
+                        queued.add(s)
+                        queue.append(s)
+        # 代入取值固定的变量，删除只含常数的约束
+        for j in range(self.variables):
+            if lb[j] != ub[j] or j in keep or j in self.removed:
+                continue
+            for r in list(self.columns[j]):
+                row = self.rows[r]
+                self.rhs[r] -= row.pop(j) * lb[j]
+                self.columns[j].discard(r)
+            self.removed.add(j)
+        for r, row in enumerate(self.rows):
+            if row is None:
+                continue
+            minimum, maximum = self.Activity(row, lb, ub)
+            b = self.rhs[r]
+            if maximum < b - EPSILON or (self.senses[r] == "=" and minimum > b + EPSILON):
+                self.infeasible = True
+            elif not row or (self.senses[r] == ">" and minimum >= b - EPSILON):
+                self.RemoveRow(r)
+        return lb, ub
+
+    def Tighten(self, r, lb, ub):
+        """
+        Tighten the 0/1 bounds of the variables of row r; return the variables whose bounds changed
+        """
+        row = self.rows[r]
+        b = self.rhs[r]
+        changed = []
+        directions = [(row, b)]
+        if self.senses[r] == "=":
+            directions.append(({j: -a for j, a in row.items()}, -b))
+        for terms, bound in directions:
+            minimum, maximum = self.Activity(terms, lb, ub)
+            if maximum < bound - EPSILON:
+                self.infeasible = True
+                return changed
+            for j, a in terms.items():
+                if lb[j] == ub[j]:
+                    continue
+                # 把 x_j 取为使活动量变小的值后，其余项的最大值仍不够时，x_j 只能取另一个值
+                if maximum - abs(a) < bound - EPSILON:
+                    if a > 0:
+                        lb[j] = 1
+                    else:
+                        ub[j] = 0
+                    changed.append(j)
+                    # 固定后活动量的最大值不变，继续检查其余变量
+        return changed
+
+    def Model(self, lb, ub):
+        """
+        Return (A, sense, rhs, columns, lb, ub) of the presolved model: columns are the ids of the kept
+        variables in order, A has one column per kept variable. An infeasible model is one empty row 0 >= 1
+        """
+        columns = [j for j in range(self.variables) if j not in self.removed]
+        index = {j: i for i, j in enumerate(columns)}
+        rows = [r for r, row in enumerate(self.rows) if row is not None]
+        if self.infeasible:
+            rows = []
+        data, indices, indptr = [], [], [0]
+        for r in rows:
+            for j, a in self.rows[r].items():
+                indices.append(index[j])
+                data.append(a)
+            indptr.append(len(indices))
+        senses = [self.senses[r] for r in rows]
+        rhs = [self.rhs[r] for r in rows]
+        if self.infeasible:
+            indptr.append(0)
+            senses.append(">")
+            rhs.append(1.0)
+        A = sp.csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64),
+                           np.asarray(indptr, dtype=np.int64)), shape=(len(indptr) - 1, len(columns)))
+        return A, np.asarray(senses, dtype="<U1"), np.asarray(rhs), columns, lb[columns], ub[columns]
@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class VariableRegistry:
+    # 变量按组登记：每组由 (前缀, 轮号) 确定，占一段连续的整数编号，形状为状态的形状（如 64 或 8 x 4）。
+    # 变量名只在导出模型时由前缀、轮号和下标生成，例如第 3 轮 x 组的下标 (7, 2) 为 x_3_7_2
+    def __init__(self):
+        self.count = 0  # 已分配的变量数
+        self.groups = {}  # (前缀, 轮号) -> 编号数组
+        self.order = []  # 按分配顺序排列的 (前缀, 轮号, 起始编号, 形状)
+        self.index = None  # 变量名 -> 编号，只在按名字查找时生成，见 Lookup
+
+    def Group(self, prefix, round, shape):
+        """
+        Return the ids of group (prefix, round) as an integer array of the given shape, allocating a dense range
+        of ids on first use. round may be None for a single variable named prefix (shape ())
+        """
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        key = (prefix, round)
+        if key not in self.groups:
+            first = self.count
+            self.groups[key] = np.arange(first, first + int(np.prod(shape, dtype=np.int64)),
+                                         dtype=np.int64).reshape(shape)
+            self.order.append((prefix, round, first, shape))
+            self.count += self.groups[key].size
+            if self.index is not None:
+                self.index.update(zip(self.Names(first), range(first, self.count)))
+        ids = self.groups[key]
+        if ids.shape != shape:
+            raise ValueError("group %s of round %s has shape %s, not %s" % (prefix, round, ids.shape, shape))
+        return ids
+
+    def State(self, prefix, round):
+        """
+        Return the ids of an already registered group, e.g. the round-r state bits
+        """
+        return self.groups[(prefix, round)]
+
+    def Names(self, start=0):
+        """
+        Return the names of the variables with ids start, start + 1, ..., in id order
+        """
+        names = []
+        for prefix, round, first, shape in self.order:
+            if first + self.groups[(prefix, round)].size <= start:
+                continue
+            if round is None:
+                group = [prefix]
+            else:
+                stem = "%s_%d_" % (prefix, round)
+                group = [stem + "_".join(map(str, position)) for position in np.ndindex(*shape)]
+            names.extend(group[max(0, start - first):])
+        return names
+
+    def Lookup(self, names):
+        """
+        Return the ids of the given names as an integer array of the same shape; a name that is not the name of
+        a registered variable is registered as a single variable
+        """
+        names = np.asarray(names, dtype=object)
+        ids = np.empty(names.shape, dtype=np.int64)
+        for position, name in np.ndenumerate(names):
+            if self.index is None:
+                self.index = {name: i for i, name in enumerate(self.Names())}
+            if name not in self.index:
+                self.Group(name, None, ())
+            ids[position] = self.index[name]
+        return ids
@@ -0,0 +1,160 @@
+import gzip
+import io
+
+import numpy as np
+
+# 写入缓冲区大小，整个模型共用一个缓冲流
+BUFFER_SIZE = 1 << 20
+
+
+def FormatNumber(value):
+    """
+    Format a coefficient or right-hand side, integers without a decimal point
+    """
+    value = float(value)
+    return "%d" % value if value.is_integer() else repr(value)
+
+
+class ModelWriter:
+    # 整个 LP 模型共用一个缓冲流：filename 为 None 时写入内存（见 Text），否则写入文件，
+    # 文件名以 .gz 结尾时用 gzip 压缩。约束按块格式化，每块只调用一次 write
+    def __init__(self, filename=None):
+        self.filename = filename
+        if filename is None:
+            self.stream = io.StringIO()
+        elif filename.endswith(".gz"):
+            self.stream = gzip.open(filename, "wt", compresslevel=6)
+        else:
+            self.stream = open(filename, "w", buffering=BUFFER_SIZE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.Close()
+
+    def Close(self):
+        if self.filename is not None and not self.stream.closed:
+            self.stream.close()
+
+    def Text(self):
+        """
+        Return the model text written so far (in-memory writers only)
+        """
+        return self.stream.getvalue()
+
+    def Write(self, text):
+        self.stream.write(text)
+
+    @staticmethod
+    def Expression(coefficients, names):
+        """
+        Return the LP text of sum coefficients[j] * names[j], zero terms dropped
+        """
+        terms = []
+        for a, name in zip(coefficients, names):
+            if a == 0:
+                continue
+            magnitude = FormatNumber(abs(a))
+            term = name if magnitude == "1" else magnitude + " " + name
+            if terms:
+                terms.append(("- " if a < 0 else "+ ") + term)
+            else:
+                terms.append(("-" if a < 0 else "") + term)
+        return " ".join(terms) if terms else "0"
+
+    def WriteObjective(self, names):
+        self.Write("Minimize\n " + (" + ".join(names) if names else "0") + "\n")
+
+    def BeginConstraints(self):
+        self.Write("Subject To\n")
+
+    def WriteRows(self, coefficients, names, sense, rhs):
+        """
+        Write a block of rows in one call: row i is coefficients[i] . names[i] (sense) rhs[i]. Rows sharing a
+        coefficient row share one format string, so only the names and right-hand sides are formatted per row
+        """
+        sense = {">": ">=", "<": "<=", "=": "="}[sense]
+        coefficients = np.asarray(coefficients).reshape(len(names), -1)
+        names = np.asarray(names, dtype=object).reshape(len(coefficients), -1)
+        templates, inverse = np.unique(coefficients, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        numbers = {b: FormatNumber(b) for b in set(np.asarray(rhs).tolist())}
+        rhs = [numbers[b] for b in np.asarray(rhs).tolist()]
+        lines = np.empty(len(coefficients), dtype=object)
+        for t, template in enumerate(templates):
+            nonzero = np.flatnonzero(template)
+            expression = ModelWriter.Expression(template[nonzero], ["%s"] * len(nonzero))
+            line = expression + " " + sense + " %s\n"
+            rows = np.flatnonzero(inverse == t)
+            lines[rows] = [line % (*row, rhs[i]) for i, row in zip(rows.tolist(), names[rows][:, nonzero].tolist())]
+        self.Write("".join(lines.tolist()))
+
+    def WriteBounds(self, names, values):
+        """
+        Write the fixed variables as a Bounds section, name = value
+        """
+        if names:
+            self.Write("Bounds\n" + "".join(" %s = %s\n" % (name, FormatNumber(value))
+                                           for name, value in zip(names, values)))
+
+    def WriteBinaries(self, names):
+        self.Write("Binary\n" + "".join(" %s\n" % name for name in names) + "End\n")
+
+
+class MPSWriter(ModelWriter):
+    # MPS 模型，与 ModelWriter 共用缓冲流与压缩。free 为 True 时为自由格式（字段以空格分隔），
+    # 否则为定长格式（字段在固定的列上，名字不超过 8 个字符）
+    def __init__(self, filename=None, free=True):
+        super().__init__(filename)
+        self.free = free
+
+    def Line(self, f1="", f2="", f3="", f4="", f5="", f6=""):
+        """
+        Return one data line; fixed format puts the fields in columns 2-3, 5-12, 15-22, 25-36, 40-47 and 50-61
+        """
+        if self.free:
+            return " " + " ".join(field for field in (f1, f2, f3, f4, f5, f6) if field) + "\n"
+        for name in (f2, f3, f5):
+            if len(name) > 8:
+                raise ValueError("name %s is longer than 8 characters, use free MPS" % name)
+        return (" %-2s %-8s  %-8s  %12s   %-8s  %12s" % (f1, f2, f3, f4, f5, f6)).rstrip() + "\n"
+
+    def WriteHeader(self, name, senses, rows):
+        """
+        Write the NAME and ROWS sections: the objective OBJ, then one row per sense ('>', '<' or '=')
+        """
+        types = {">": "G", "<": "L", "=": "E"}
+        self.Write("NAME          %s\nROWS\n" % name + self.Line("N", "OBJ")
+                   + "".join(self.Line(types[s], r) for s, r in zip(senses, rows)))
+
+    def WriteColumns(self, names, matrix, rows, objective):
+        """
+        Write the COLUMNS section of binary columns: column j has objective coefficient 1 if j is in objective
+        and its entries in the CSC matrix, two entries per line
+        """
+        objective = set(objective)
+        lines = [self.Line("", "MARKER", "'MARKER'", "", "'INTORG'")]
+        for j, name in enumerate(names):
+            start, end = matrix.indptr[j], matrix.indptr[j + 1]
+            entries = [("OBJ", "1")] if j in objective else []
+            entries += [(rows[i], FormatNumber(a)) for i, a in zip(matrix.indices[start:end].tolist(),
+                                                                   matrix.data[start:end].tolist())]
+            for k in range(0, len(entries), 2):
+                lines.append(self.Line("", name, *entries[k], *(entries[k + 1] if k + 1 < len(entries) else ())))
+        lines.append(self.Line("", "MARKER", "'MARKER'", "", "'INTEND'"))
+        self.Write("COLUMNS\n" + "".join(lines))
+
+    def WriteRHS(self, rows, rhs):
+        """
+        Write the RHS section, zero right-hand sides omitted
+        """
+        self.Write("RHS\n" + "".join(self.Line("", "RHS", r, FormatNumber(b)) for r, b in zip(rows, rhs) if b != 0))
+
+    def WriteBinaryBounds(self, names, fixed):
+        """
+        Write the BOUNDS section: fixed columns (index -> value) as FX, all other columns binary
+        """
+        self.Write("BOUNDS\n" + "".join(
+            self.Line("FX", "BND", name, FormatNumber(fixed[j])) if j in fixed else self.Line("BV", "BND", name)
+            for j, name in enumerate(names)) + "ENDATA\n")
@@ -0,0 +1,18 @@
+from present import Present
+
+if __name__ == "__main__":  # 判断脚本是否作为主程序运行
+    rounds = int(input("请输入目标轮数: "))  # 用户输入目标回合数，并将其转换为整数
+    while not (rounds > 0):  # 如果输入的回合数小于等于0，则提示重新输入
+        print("轮数必须大于零！")  # 提示用户输入大于0的回合数
+        rounds = int(input("请重新输入目标轮数: "))  # 重新输入回合数
+    Present = Present(rounds)  # 创建一个Present对象，初始化时传入目标回合数
+
+
+    brute_force_flag = input("请选择：（1）自动搜索  （0）手动输入  （2）逐轮搜索到目标轮数 \n")  # 询问用户是否选择暴力破解（1）、探测特定情况（0）或逐轮搜索（2）
+    while (brute_force_flag not in ['0', '1', '2']):  # 如果输入不是0、1或2，要求重新输入
+        print("请输入0、1或2！")  # 提示用户输入有效选项
+        brute_force_flag = input("请选择：（1）自动搜索  （0）手动输入  （2）逐轮搜索到目标轮数 \n")  # 重新输入
+
+    Present.set_brute_force_flag(brute_force_flag)  # 设置Present对象的暴力破解标志
+    Present.set_constant_bits()
+
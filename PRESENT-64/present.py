@@ -0,0 +1,51 @@
+"""
+"x_i_63, x_i_62, ..., x_i_0" 表示第 (i+1) 轮的输入。
+"""
+
+import os
+import sys
+
+# 仓库根目录，用于导入 Milp 中的模型引擎
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from Milp import CipherModel, derive_inequalities
+
+
+class Present(CipherModel):
+    # PRESENT Sbox
+    SBOX = [0xc, 0x5, 0x6, 0xb, 0x9, 0x0, 0xa, 0xd, 0x3, 0xe, 0xf, 0x8, 0x4, 0x7, 0x1, 0x2]
+
+    # P 盒：第 i 个比特移到第 16 * i mod 63 个比特，第 63 个比特不动
+    P_BOX = [16 * i % 63 for i in range(63)] + [63]
+
+    # 密码描述（见 Milp/engine.py）：与 GIFT-64 相同的 SPN 结构，第 i 轮的输出 x_i 经过 P 盒（第 0 轮没有）
+    # 和 S 盒层得到 x_(i+1)，第 k 个 S 盒的输入为 x[4k+3..4k]；最后一轮的线性层省略
+    DESCRIPTION = {
+        "name": "PRESENT",
+        "blocksize": 64,
+        "state": {"x": 64},
+        "input": ["x"],
+        "output": ["x"],
+        "round": [
+            ("permute", "x", P_BOX, {"from_round": 1}),
+            ("sbox", "x", "x", 4, True),
+        ],
+        "solve": "unit",
+    }
+
+    def __init__(self, round, sbox=None, inequalities=None, settings=None, export_lp=False, model_format="lp",
+                 presolve=False):
+        """
+        参数:
+            round (int): 轮数
+            sbox (list): 可选，S 盒表，默认为 PRESENT 的 S 盒，不等式从 S 盒推导
+            inequalities (list): 可选，直接给出的 S 盒不等式，优先于 sbox
+            settings (dict): 可选，推导不等式时的生成参数
+            export_lp (bool): 可选，为 True 时把模型另外导出为模型文件，求解本身不需要该文件
+            model_format (str): 可选，导出的模型文件格式，"lp" 或 "mps"，加上 ".gz" 时压缩
+            presolve (bool): 可选，为 True 时每次求解前先对模型做结构预处理，见 Milp/presolve.py
+        """
+        if inequalities is None:
+            inequalities = derive_inequalities(sbox if sbox is not None else Present.SBOX, settings)
+        super().__init__(round, Present.DESCRIPTION, inequalities, export_lp, model_format, presolve)
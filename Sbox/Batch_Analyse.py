@@ -0,0 +1,108 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import SboxCache
+from sbox import WriteDivisionTrails
+
+
+def parse_sbox(text):
+	"""
+	解析S盒字符串，格式与Step1相同，例如 [0xc, 0x5, ...]
+	"""
+	text = text.strip()
+	if text.startswith('['):
+		text = text[1:-1]  # 去掉两边的方括号
+	return [int(x.strip(), 16) for x in text.split(',') if x.strip()]
+
+
+def read_sbox_list(filename):
+	"""
+	从文件中读取S盒列表，每行为 "名称: [S盒]" 或 "[S盒]"，空行和 # 开头的行被忽略
+	"""
+	boxes = []
+	with open(filename, 'r') as fileobj:
+		for line in fileobj:
+			line = line.strip()
+			if not line or line.startswith('#'):
+				continue
+			if ':' in line:
+				name, table = line.split(':', 1)
+			else:
+				name, table = "sbox%d" % len(boxes), line
+			boxes.append((name.strip(), parse_sbox(table)))
+	return boxes
+
+
+def analyse_sbox(name, sbox, settings, output_dir):
+	"""
+	对一个S盒运行 轨迹 -> 不等式 -> 约简 整条流程，各阶段结果由缓存保存，
+	并在 output_dir/名称/ 下写出结果包，返回各阶段用时
+	"""
+	timings = {}
+	cache = SboxCache(sbox, settings)
+	start = time.time()
+	points = cache.Points()
+	timings["trails"] = time.time() - start
+	start = time.time()
+	inequalities = cache.Inequalities()
+	timings["inequalities"] = time.time() - start
+	start = time.time()
+	reduced = cache.ReducedInequalities()
+	timings["reduce"] = time.time() - start
+
+	bundle = os.path.join(output_dir, name)
+	os.makedirs(bundle, exist_ok=True)
+	rows, size = cache.Trails()
+	WriteDivisionTrails(os.path.join(bundle, name + "_DivisionTrails.bin"), rows["input"], rows["output"], size)
+	SboxCache.SaveInequalities(os.path.join(bundle, name + "_Inequalities.txt"), inequalities)
+	SboxCache.SaveInequalities(os.path.join(bundle, name + "_Reduce_Inequalities.txt"), reduced)
+	summary = {
+		"name": name,
+		"sbox": sbox,
+		"settings": cache.settings,
+		"trails": len(points),
+		"inequalities": len(inequalities),
+		"reduced": len(reduced),
+		"timings": timings,
+	}
+	with open(os.path.join(bundle, "summary.json"), 'w') as fileobj:
+		json.dump(summary, fileobj, indent=2)
+	return summary
+
+
+def run_batch(boxes, settings=None, output_dir="./batch_result", workers=None):
+	"""
+	用进程池并行分析多个S盒，workers默认为CPU核数
+	"""
+	os.makedirs(output_dir, exist_ok=True)
+	summaries = []
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = {pool.submit(analyse_sbox, name, sbox, settings, output_dir): name for name, sbox in boxes}
+		for future in as_completed(futures):
+			summary = future.result()
+			summaries.append(summary)
+			print("%s: 轨迹 %d, 不等式 %d, 约简后 %d, 用时 %s" % (
+				summary["name"], summary["trails"], summary["inequalities"], summary["reduced"],
+				", ".join("%s=%.2fs" % (k, v) for k, v in summary["timings"].items())))
+	summaries.sort(key=lambda s: s["name"])
+	return summaries
+
+
+if __name__ == "__main__":
+	# 用法: python Batch_Analyse.py S盒列表文件 [生成方法 hull/cubes] [约简方法 greedy/exact/restarts]
+	if len(sys.argv) > 1:
+		filename = sys.argv[1]
+	else:
+		filename = input("S盒列表文件: ")
+	settings = {}
+	if len(sys.argv) > 2:
+		settings["generator"] = sys.argv[2]
+	if len(sys.argv) > 3:
+		settings["reducer"] = sys.argv[3]
+
+	time_start = time.time()
+	summaries = run_batch(read_sbox_list(filename), settings)
+	print("共 %d 个S盒，用时为 = %.2f" % (len(summaries), time.time() - time_start))
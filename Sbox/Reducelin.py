@@ -1,8 +1,42 @@
 import copy
+import itertools
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+from sbox import ReadDivisionTrails, TrailPoints
+
+# 随机重启的工作进程共享的覆盖位集和需要去掉的点，由进程池的 initializer 设置
+_restart_cover = None
+_restart_remaining = None
+
+
+def _InitRestartWorker(cover, remaining):
+    global _restart_cover, _restart_remaining
+    _restart_cover = cover
+    _restart_remaining = remaining
+
+
+def _RestartBatch(seeds, noise):
+    """
+    在工作进程中运行一批随机贪心，返回 (最小的子集, 本批所有子集的大小)
+    """
+    best = None
+    sizes = []
+    for seed in seeds:
+        selected = Reduce.RandomizedGreedyCover(_restart_cover, _restart_remaining, seed, noise)
+        sizes.append(len(selected))
+        if best is None or len(selected) < len(best):
+            best = selected
+    return best, sizes
+
 
 class Reduce():
-    def __init__(self, filename):
+    def __init__(self, filename, trails_filename='./GIFT-64_DivisionTrails.bin'):
         self.filename = filename   # 存储文件路径
+        self.trails_filename = trails_filename   # 二进制分割轨迹文件路径
 
     def ReadIne(self):
         """
@@ -38,49 +72,251 @@ class Reduce():
         # 计算Ax + b的结果，使用zip将p和l中的元素一一对应相乘并求和
         return sum([x * y for (x, y) in zip(temp_p, l)])
 
-    def InequalitySizeReduce(self):
+    @staticmethod
+    def PopCount(words):
         """
-        给定一组点和对应的H-Representation，从H-Representation中选择一个子集的不等式，
-        该子集的表达式等价于描述这些点的集合。
+        按最后一维统计 uint64 位集中 1 的个数。
         """
-        with open('./GIFT-64_DivisionTrails.txt', 'r') as file:  ###
-            points = []
-            for line in file:
-                # 去掉行首尾空格，去掉括号，分割数字并转换为整数
-                line = line.strip()[1:-1]  # 去掉两边的括号
-                # 使用列表推导式，只处理非空字符串并将其转换为整数
-                numbers = [int(x.strip()) for x in line.split(',') if x.strip()]
-                points.append(numbers)
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+        table = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+        return table[words.view(np.uint8)].sum(axis=-1)
 
-        inequalities = self.ReadIne()  # 读取线性不等式
+    @staticmethod
+    def ImpossiblePoints(points):
+        """
+        返回 {0,1}^n 中不在points中的点（不可能点），每一行是一个点，高位在前。
+        """
+        points = np.asarray(points, dtype=np.int64)
+        length = points.shape[1]
+        weights = 1 << np.arange(length - 1, -1, -1, dtype=np.int64)
+        possible = np.zeros(2**length, dtype=bool)
+        possible[points @ weights] = True
+        index = np.flatnonzero(~possible)
+        return ((index[:, None] >> np.arange(length - 1, -1, -1)) & 1).astype(np.int8)
+
+    @staticmethod
+    def CoverageBitsets(cpoints, inequalities, budget=1 << 26):
+        """
+        计算每个不等式在不可能点集cpoints上不满足的点，结果按位打包：
+        第k行的第j位为1表示第j个不可能点违反第k个不等式。
+        为了限制内存，按点分块做整数矩阵乘法，每块的中间结果不超过budget个元素。
+        """
+        ine = np.asarray(inequalities, dtype=np.int64)
+        coefficients = ine[:, :-1].T.astype(np.int32)
+        constants = ine[:, -1].astype(np.int32)
+        words = (len(cpoints) + 63) // 64
+        cover = np.zeros((len(ine), words * 8), dtype=np.uint8)
+        chunk = max(64, (budget // len(ine)) // 64 * 64)
+        for start in range(0, len(cpoints), chunk):
+            block = np.asarray(cpoints[start:start + chunk], dtype=np.int32)
+            violated = (block @ coefficients + constants) < 0  # 形状：点数 x 不等式数
+            packed = np.packbits(violated.T, axis=1, bitorder="little")
+            cover[:, start // 8:start // 8 + packed.shape[1]] = packed
+        return cover.view("<u8")
+
+    @staticmethod
+    def FullBitset(count):
+        """
+        返回前count位为1的uint64位集。
+        """
+        bits = np.zeros(((count + 63) // 64) * 64, dtype=bool)
+        bits[:count] = True
+        return np.packbits(bits, bitorder="little").view("<u8")
+
+    @staticmethod
+    def GreedyCover(cover, remaining):
+        """
+        贪心地选择不等式：每一轮选择去掉剩余不可能点最多的不等式，个数相同时选择下标最小的。
+        cover为CoverageBitsets的结果，remaining为需要去掉的不可能点的位集，返回被选中不等式的下标列表。
+        """
+        remaining = remaining.copy()
+        chosen = np.zeros(len(cover), dtype=bool)
+        selected = []
+        while remaining.any():
+            counts = Reduce.PopCount(cover & remaining)
+            counts[chosen] = -1
+            k = int(np.argmax(counts))
+            assert counts[k] > 0, "不等式集无法去掉所有不可能点"
+            selected.append(k)
+            chosen[k] = True
+            remaining &= ~cover[k]
+        return selected
+
+    @staticmethod
+    def RandomizedGreedyCover(cover, remaining, seed, noise=0.1):
+        """
+        随机化的GreedyCover：每个不等式去掉的点数乘以 1 + noise * U(0,1) 的扰动后再取最大值，
+        因此个数相同时随机选择；seed为0时不加扰动，即GreedyCover。选择结束后去掉冗余的不等式。
+        """
+        if seed == 0:
+            selected = Reduce.GreedyCover(cover, remaining)
+        else:
+            rng = np.random.default_rng(seed)
+            left = remaining.copy()
+            chosen = np.zeros(len(cover), dtype=bool)
+            selected = []
+            while left.any():
+                counts = Reduce.PopCount(cover & left)
+                scores = counts * (1 + noise * rng.random(len(cover)))
+                scores[chosen | (counts == 0)] = -1
+                k = int(np.argmax(scores))
+                assert scores[k] > 0, "不等式集无法去掉所有不可能点"
+                selected.append(k)
+                chosen[k] = True
+                left &= ~cover[k]
+        return Reduce.PruneCover(cover, remaining, selected)
+
+    @staticmethod
+    def PruneCover(cover, remaining, selected):
+        """
+        按选择的逆序检查，去掉被其余选中不等式完全覆盖的不等式。
+        """
+        selected = list(selected)
+        for k in reversed(list(selected)):
+            others = np.zeros_like(remaining)
+            for j in selected:
+                if j != k:
+                    others |= cover[j]
+            if not (remaining & ~others).any():
+                selected.remove(k)
+        return selected
+
+    @staticmethod
+    def RestartSelectInequalities(points, inequalities, time_limit=60, workers=None, restarts=None,
+                                  noise=0.1, batch=8):
+        """
+        在进程池中并行运行多次随机贪心（见RandomizedGreedyCover），在time_limit秒内
+        （或完成restarts次后）保留最小的子集。第一次运行即确定性的贪心，因此结果不差于SelectInequalities。
+        每个工作进程一次运行batch个种子。
+        返回 (选中的不等式, 报告)，报告中包含贪心解的大小、最小子集的大小、运行次数以及各大小出现的次数。
+        """
+        cpoints = Reduce.ImpossiblePoints(points)
+        cover = Reduce.CoverageBitsets(cpoints, inequalities)
+        remaining = Reduce.FullBitset(len(cpoints))
+        greedy = len(Reduce.GreedyCover(cover, remaining))
+        workers = workers or os.cpu_count()
+        deadline = time.time() + time_limit
+        seeds = iter(range(restarts)) if restarts else itertools.count()
+        best = None
+        sizes = Counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_InitRestartWorker,
+                                 initargs=(cover, remaining)) as pool:
+            pending = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < 2 * workers and time.time() < deadline:
+                    chunk = [seed for _, seed in zip(range(batch), seeds)]
+                    if not chunk:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(_RestartBatch, chunk, noise))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    selected, batch_sizes = future.result()
+                    sizes.update(batch_sizes)
+                    if best is None or len(selected) < len(best):
+                        best = selected
+        report = {
+            "greedy": greedy,
+            "size": len(best),
+            "restarts": sum(sizes.values()),
+            "sizes": dict(sorted(sizes.items())),
+        }
+        return [list(inequalities[k]) for k in best], report
+
+    @staticmethod
+    def SelectInequalities(points, inequalities):
+        """
+        从inequalities中贪心地选择一个子集，使其恰好描述points。
+        """
         assert len(points) > 0  # 确保点集非空
         assert len(inequalities) > 0  # 确保不等式集非空
         assert len(points[0]) + 1 == len(inequalities[0])  # 检查点的维度和不等式的维度是否匹配
-        length = len(points[0])  # 获取点的维度
-
-        # 获取所有可能的点集 {0,1}^n，表示为二进制位
-        apoints = [Reduce.Integer2Bitlist(i, length) for i in range(2**length)]
-        # 获取补集：所有不在points中的点
-        cpoints = [p for p in apoints if p not in points]
-        ineq = copy.deepcopy(inequalities)  # 深拷贝不等式集
-        rineq = []  # 存储选择的子集不等式
-
-        # 当补集cpoints不为空时，继续处理
-        while len(cpoints) > 0:
-            temp_p = []  # 存储临时点集
-            temp_l = []  # 存储临时选择的不等式
-            # 找到一个不等式，这个不等式在cpoints中不满足的点最多
-            for l in ineq:
-                temp = [p for p in cpoints if (Reduce.ValueOfExpression(p, l) < 0)]  # 计算不等式值，找到不满足不等式的点
-                if len(temp) > len(temp_p):  # 如果当前不等式不满足的点更多，则更新temp_p和temp_l
-                    temp_p = temp
-                    temp_l = l
-            # 将这些点从补集cpoints中移除
-            for p in temp_p:
-                cpoints.remove(p)
-            # 将选择的不等式添加到结果集合中
-            rineq.append(temp_l)
-            # 移除已选择的不等式
-            ineq.remove(temp_l)
-
-        return rineq  # 返回最终选择的不等式子集
+        cpoints = Reduce.ImpossiblePoints(points)
+        cover = Reduce.CoverageBitsets(cpoints, inequalities)
+        # 所有不可能点都必须被去掉
+        selected = Reduce.GreedyCover(cover, Reduce.FullBitset(len(cpoints)))
+        return [list(inequalities[k]) for k in selected]
+
+    @staticmethod
+    def SelectFromChunks(points, chunks):
+        """
+        与SelectInequalities相同，但不等式按块（例如ForbiddenCubes.Candidates）逐块给出，
+        每块只保留其按位打包的覆盖结果。
+        """
+        cpoints = Reduce.ImpossiblePoints(points)
+        rows = []
+        covers = []
+        for chunk in chunks:
+            assert len(points[0]) + 1 == len(chunk[0])  # 检查点的维度和不等式的维度是否匹配
+            covers.append(Reduce.CoverageBitsets(cpoints, chunk))
+            rows.extend(np.asarray(chunk).tolist())
+        assert len(rows) > 0  # 确保不等式集非空
+        selected = Reduce.GreedyCover(np.concatenate(covers), Reduce.FullBitset(len(cpoints)))
+        return [rows[k] for k in selected]
+
+    @staticmethod
+    def ExactSelectInequalities(points, inequalities, time_limit=60, output_flag=0):
+        """
+        用MILP（Gurobi）精确求解最小集合覆盖：选择最少的不等式去掉所有不可能点。
+        以贪心结果作为初始解，time_limit为求解时间上限（秒）。
+        返回 (选中的不等式, 报告)，报告中包含贪心解的大小、找到的最优值、已证明的下界以及是否证明最优。
+        """
+        import gurobipy as gp
+
+        cpoints = Reduce.ImpossiblePoints(points)
+        cover = Reduce.CoverageBitsets(cpoints, inequalities)
+        greedy = Reduce.GreedyCover(cover, Reduce.FullBitset(len(cpoints)))
+
+        m = gp.Model("InequalitySetCover")
+        m.setParam("OutputFlag", output_flag)
+        m.setParam("TimeLimit", time_limit)
+        z = m.addVars(len(inequalities), vtype=gp.GRB.BINARY, name="z")
+        m.setObjective(z.sum(), gp.GRB.MINIMIZE)
+        # 每个不可能点至少被一个选中的不等式去掉，按64个点一组展开位集
+        for w in range(cover.shape[1]):
+            bits = np.unpackbits(cover[:, w:w + 1].view(np.uint8), axis=1, bitorder="little")
+            for j in range(min(64, len(cpoints) - 64 * w)):
+                index = np.flatnonzero(bits[:, j])
+                m.addConstr(gp.quicksum(z[int(k)] for k in index) >= 1)
+        # 贪心结果作为初始解
+        for k in range(len(inequalities)):
+            z[k].Start = 0
+        for k in greedy:
+            z[k].Start = 1
+        m.optimize()
+
+        if m.SolCount > 0:
+            selected = [k for k in range(len(inequalities)) if z[k].X > 0.5]
+        else:
+            selected = greedy
+        report = {
+            "greedy": len(greedy),
+            "size": len(selected),
+            "bound": int(np.ceil(m.ObjBound - 1e-6)),
+            "optimal": m.Status == gp.GRB.OPTIMAL,
+        }
+        return [list(inequalities[k]) for k in selected], report
+
+    def InequalitySizeReduce(self, exact=False, time_limit=60, restarts=False):
+        """
+        给定一组点和对应的H-Representation，从H-Representation中选择一个子集的不等式，
+        该子集的表达式等价于描述这些点的集合。
+        exact为True时用MILP求最小子集（见ExactSelectInequalities），restarts为True时在time_limit秒内
+        并行运行随机贪心（见RestartSelectInequalities），结果报告保存在self.report中。
+        """
+        # 从二进制分割轨迹文件中读取点集
+        rows, size = ReadDivisionTrails(self.trails_filename)
+        points = TrailPoints(rows["input"], rows["output"], size)
+
+        inequalities = self.ReadIne()  # 读取线性不等式
+        if exact:
+            rineq, self.report = Reduce.ExactSelectInequalities(points, inequalities, time_limit)
+            return rineq
+        if restarts:
+            rineq, self.report = Reduce.RestartSelectInequalities(points, inequalities, time_limit)
+            return rineq
+        return Reduce.SelectInequalities(points, inequalities)  # 返回最终选择的不等式子集
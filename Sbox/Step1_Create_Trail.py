@@ -17,6 +17,6 @@ if __name__ == "__main__":
 
 	present = Sbox(sbox)
 
-	filename = cipher_name + "_DivisionTrails.txt"
+	filename = cipher_name + "_DivisionTrails.bin"
 
-	present.PrintfDivisionTrails(filename)
+	present.WriteDivisionTrails(filename)
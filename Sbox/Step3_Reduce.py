@@ -6,9 +6,24 @@ if __name__ == "__main__":
 	cipher_name = input("算法名称: ")
 	# sbox = [0xc, 0xa, 0xd, 0x3, 0xe, 0xb, 0xf, 0x7, 0x8, 0x9, 0x1, 0x5, 0x0, 0x2, 0x4, 0x6]
 	filename_inequalities = cipher_name + "_Inequalities.txt"
+	filename_trails = cipher_name + "_DivisionTrails.bin"
 
-	present = Reduce(filename_inequalities)
-	rine = present.InequalitySizeReduce()
+	method = input("请选择：（1）精确求最小子集  （2）并行随机贪心  （0）贪心 \n")
+
+	present = Reduce(filename_inequalities, filename_trails)
+	if method == '1':
+		time_limit = float(input("请输入求解时间上限（秒）: "))
+		rine = present.InequalitySizeReduce(exact=True, time_limit=time_limit)
+		print("贪心解: %d, 最优解: %d, 下界: %d" %
+			  (present.report["greedy"], present.report["size"], present.report["bound"]))
+	elif method == '2':
+		time_limit = float(input("请输入求解时间上限（秒）: "))
+		rine = present.InequalitySizeReduce(restarts=True, time_limit=time_limit)
+		print("贪心解: %d, 最小子集: %d, 运行次数: %d" %
+			  (present.report["greedy"], present.report["size"], present.report["restarts"]))
+		print("子集大小分布: " + ", ".join("%d: %d" % item for item in present.report["sizes"].items()))
+	else:
+		rine = present.InequalitySizeReduce()
 
 	filename_result = cipher_name + "_Reduce_Inequalities.txt"
 
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from sbox import Sbox, ReadDivisionTrails, WriteDivisionTrails, TrailPoints
+from hrep import ConvexHull
+from cubes import ForbiddenCubes
+from Reducelin import Reduce
+from equivalence import Canonicalize, TransformTrails, TransformInequalities
+from validate import CheckInequalities
+from cnf import TrailCNF, ClausesToInequalities, InequalitiesToClauses, WriteDIMACS, ReadDIMACS
+
+# 默认缓存目录，可通过环境变量 SBOX_CACHE_DIR 修改
+DEFAULT_CACHE_DIR = os.environ.get("SBOX_CACHE_DIR",
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"))
+
+# 默认的生成参数：generator 为 "hull"（凸包）或 "cubes"（不可能子立方体），
+# reducer 为 "greedy"（贪心）、"exact"（MILP 精确求解）或 "restarts"（并行随机贪心），
+# 后两者的 time_limit 为时间上限
+DEFAULT_SETTINGS = {"generator": "hull", "reducer": "greedy", "time_limit": 60}
+
+
+def Digest(obj):
+    """
+    Return the sha256 hex digest of a JSON-serializable object
+    """
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SboxCache:
+    # 初始化方法，接收 S-box 映射和生成参数。S 盒先被规范化为其等价类的代表元，
+    # 缓存目录按代表元的哈希值区分，等价的 S 盒共享轨迹和不等式
+    def __init__(self, sbox, settings=None, directory=None):
+        self.sbox = [int(x) for x in sbox]
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self.canonical, self.transform = Canonicalize(self.sbox)
+        self.key = Digest({"sbox": self.canonical})
+        self.directory = os.path.join(directory or DEFAULT_CACHE_DIR, self.key)
+        os.makedirs(self.directory, exist_ok=True)
+        self.SBOXSIZE = Sbox(self.sbox).SBOXSIZE
+
+    # 每个阶段的文件名只依赖于该阶段及之前阶段用到的参数
+    def Path(self, name, *keys):
+        """
+        Return the file path of an artifact, suffixed by a hash of the settings the stage depends on
+        """
+        if keys:
+            stem, ext = os.path.splitext(name)
+            name = "%s_%s%s" % (stem, Digest({k: self.settings[k] for k in keys})[:16], ext)
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def Store(path, write):
+        """
+        Write an artifact atomically: write(temporary path) then rename
+        """
+        temp = "%s.%d.tmp" % (path, os.getpid())
+        write(temp)
+        os.replace(temp, path)
+
+    @staticmethod
+    def SaveArray(path, array):
+        """
+        Save a NumPy array in .npy format to exactly the given path
+        """
+        with open(path, "wb") as fileobj:
+            np.save(fileobj, array)
+
+    @staticmethod
+    def SaveInequalities(path, inequalities):
+        """
+        Save inequalities in the same text format as *_Inequalities.txt, one row per line
+        """
+        np.savetxt(path, np.asarray(inequalities, dtype=np.int64).reshape(len(inequalities), -1), fmt="%d")
+
+    @staticmethod
+    def LoadInequalities(path):
+        """
+        Load inequalities written by SaveInequalities as a 2-D integer array
+        """
+        return np.loadtxt(path, dtype=np.int64, ndmin=2)
+
+    # 第一阶段：ANF 矩阵（ANF 不是等价不变量，按 S 盒本身的哈希值保存）
+    def ANF(self):
+        path = os.path.join(self.directory, "anf_%s.npy" % Digest({"sbox": self.sbox})[:16])
+        if not os.path.exists(path):
+            matrix = Sbox(self.sbox).CreatANFMatrix()
+            self.Store(path, lambda temp: self.SaveArray(temp, matrix))
+        return np.load(path)
+
+    # 第二阶段：分割轨迹（二进制轨迹文件，保存的是代表元的轨迹）
+    def Trails(self):
+        path = self.Path("trails.bin")
+        if not os.path.exists(path):
+            inputs, outputs = Sbox(self.canonical).CreateDivisionTrailMasks()
+            self.Store(path, lambda temp: WriteDivisionTrails(temp, inputs, outputs, self.SBOXSIZE))
+        rows, size = ReadDivisionTrails(path)
+        if self.IsRepresentative():
+            return rows, size
+        # 把代表元的轨迹变换回当前 S 盒
+        inputs, outputs = TransformTrails(rows["input"], rows["output"], self.transform)
+        order = np.lexsort((outputs, inputs))
+        result = np.empty(len(rows), dtype=rows.dtype)
+        result["input"] = inputs[order]
+        result["output"] = outputs[order]
+        return result, size
+
+    def IsRepresentative(self):
+        """
+        Return True if the sbox is its own class representative
+        """
+        return self.canonical == self.sbox
+
+    def Points(self):
+        """
+        Return the division trails of the sbox as 0/1 points
+        """
+        rows, size = self.Trails()
+        return TrailPoints(rows["input"], rows["output"], size)
+
+    def CanonicalPoints(self):
+        """
+        Return the division trails of the class representative as 0/1 points
+        """
+        self.Trails()
+        rows, size = ReadDivisionTrails(self.Path("trails.bin"))
+        return TrailPoints(rows["input"], rows["output"], size)
+
+    # 以下各阶段在写入缓存前都用 validate.CheckInequalities 检查结果恰好描述分割轨迹
+
+    # 第三阶段：候选不等式（凸包的 H-representation 或不可能子立方体）
+    def Inequalities(self):
+        return TransformInequalities(self.CanonicalInequalities(), self.transform)
+
+    def CanonicalInequalities(self):
+        path = self.Path("inequalities.txt", "generator")
+        if not os.path.exists(path):
+            points = self.CanonicalPoints()
+            if self.settings["generator"] == "cubes":
+                inequalities = np.concatenate(list(ForbiddenCubes(points).Candidates()))
+            else:
+                inequalities = ConvexHull(points).Inequalities()
+            CheckInequalities(points, inequalities, "candidate inequalities")
+            self.Store(path, lambda temp: self.SaveInequalities(temp, inequalities))
+        return self.LoadInequalities(path)
+
+    # 第四阶段：约简后的不等式
+    def ReducedInequalities(self):
+        keys = ["generator", "reducer"] + (["time_limit"] if self.settings["reducer"] != "greedy" else [])
+        path = self.Path("reduced.txt", *keys)
+        if not os.path.exists(path):
+            points = self.CanonicalPoints()
+            inequalities = self.CanonicalInequalities().tolist()
+            if self.settings["reducer"] == "exact":
+                rineq, report = Reduce.ExactSelectInequalities(points, inequalities, self.settings["time_limit"])
+            elif self.settings["reducer"] == "restarts":
+                rineq, report = Reduce.RestartSelectInequalities(points, inequalities, self.settings["time_limit"])
+            else:
+                rineq = Reduce.SelectInequalities(points, inequalities)
+            CheckInequalities(points, rineq, "reduced inequalities")
+            self.Store(path, lambda temp: self.SaveInequalities(temp, rineq))
+        return TransformInequalities(self.LoadInequalities(path), self.transform)
+
+    # SAT 编码：描述分割轨迹的极小 CNF（代表元坐标下保存为 DIMACS 文件）
+    def CNF(self):
+        """
+        Return the clause set describing the division trails of the sbox, see cnf.TrailCNF
+        """
+        path = self.Path("trails.cnf")
+        if not os.path.exists(path):
+            points = self.CanonicalPoints()
+            clauses = TrailCNF(points)
+            CheckInequalities(points, ClausesToInequalities(clauses, 2 * self.SBOXSIZE), "CNF clauses")
+            self.Store(path, lambda temp: WriteDIMACS(temp, clauses, 2 * self.SBOXSIZE))
+        clauses = ReadDIMACS(path)
+        if self.IsRepresentative():
+            return clauses
+        rows = TransformInequalities(ClausesToInequalities(clauses, 2 * self.SBOXSIZE), self.transform)
+        return InequalitiesToClauses(rows)
+
+
+def LookupInequalities(sbox, settings=None, directory=None):
+    """
+    Return the reduced inequalities of an sbox as a list of rows [a_1, ..., a_2n, b], computing and caching
+    only the missing stages
+    """
+    return SboxCache(sbox, settings, directory).ReducedInequalities().tolist()
+
+
+def LookupCNF(sbox, directory=None):
+    """
+    Return the cached CNF of the division trails of an sbox as a list of clauses (DIMACS literals)
+    """
+    return SboxCache(sbox, directory=directory).CNF()
@@ -0,0 +1,113 @@
+import numpy as np
+
+from cubes import ForbiddenCubes
+from Reducelin import Reduce
+
+# 不超过该维数时用 Quine–McCluskey 求出全部素蕴含立方体，更大时用 Espresso 式的扩展生成候选
+MAX_QM_DIMENSION = 10
+
+
+def PrimeCubes(impossible, dimension):
+    """
+    Return all prime implicants of the forbidden-point set (maximal subcubes containing only impossible
+    points) as (point index, free mask) pairs, Quine–McCluskey style: a cube with free mask m is forbidden
+    iff both halves along any free bit are. The table has 2^dimension entries per mask
+    """
+    size = 2**dimension
+    values = np.arange(size, dtype=np.int64)
+    forbidden = {0: np.asarray(impossible, dtype=bool)}
+    for mask in range(1, size):
+        low = mask & -mask
+        half = forbidden[mask ^ low]
+        forbidden[mask] = half & half[values ^ low]
+    cubes = []
+    for mask in range(size):
+        prime = forbidden[mask].copy()
+        for bit in range(dimension):
+            if not (mask >> bit) & 1:
+                prime &= ~forbidden[mask | (1 << bit)]
+        # 每个立方体只保留自由比特为 0 的代表点
+        prime &= (values & mask) == 0
+        cubes.extend((int(index), mask) for index in np.flatnonzero(prime))
+    return cubes
+
+
+def CubeClause(index, free, dimension):
+    """
+    Return the clause excluding a subcube as DIMACS literals over variables 1..dimension, variable c + 1
+    being coordinate c of the points (most significant bit first)
+    """
+    clause = []
+    for c in range(dimension):
+        bit = dimension - 1 - c
+        if (free >> bit) & 1:
+            continue
+        clause.append(-(c + 1) if (index >> bit) & 1 else c + 1)
+    return clause
+
+
+def ClausesToInequalities(clauses, dimension):
+    """
+    Write each clause as the inequality [a_1, ..., a_n, b] violated exactly where the clause is false
+    """
+    rows = np.zeros((len(clauses), dimension + 1), dtype=np.int64)
+    for k, clause in enumerate(clauses):
+        for literal in clause:
+            if literal > 0:
+                rows[k, literal - 1] = 1
+            else:
+                rows[k, -literal - 1] = -1
+                rows[k, -1] += 1
+        rows[k, -1] -= 1
+    return rows
+
+
+def InequalitiesToClauses(rows):
+    """
+    Inverse of ClausesToInequalities
+    """
+    return [[c + 1 if a > 0 else -(c + 1) for c, a in enumerate(row[:-1]) if a != 0] for row in np.asarray(rows)]
+
+
+def TrailCNF(points, variants=None):
+    """
+    Return a small CNF describing exactly the given 0/1 points (for example the division trails) as a list
+    of clauses. The candidate clauses are the prime implicants of the forbidden-point set, all of them up to
+    MAX_QM_DIMENSION variables and otherwise the maximal subcubes of ForbiddenCubes expanded in `variants`
+    bit orders (default: every rotation); the clauses are then chosen by the greedy cover of Reducelin
+    """
+    cubes = ForbiddenCubes(points)
+    dimension = cubes.dimension
+    if dimension <= MAX_QM_DIMENSION:
+        primes = PrimeCubes(cubes.impossible, dimension)
+    else:
+        primes = list(cubes.IterCubes(variants or dimension))
+    if not primes:
+        return []
+    candidates = ClausesToInequalities([CubeClause(index, free, dimension) for index, free in primes], dimension)
+    return InequalitiesToClauses(Reduce.SelectInequalities(points, candidates.tolist()))
+
+
+def WriteDIMACS(filename, clauses, variables, comments=()):
+    """
+    Write clauses in DIMACS CNF format
+    """
+    with open(filename, "w") as fileobj:
+        for comment in comments:
+            fileobj.write("c %s\n" % comment)
+        fileobj.write("p cnf %d %d\n" % (variables, len(clauses)))
+        for clause in clauses:
+            fileobj.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def ReadDIMACS(filename):
+    """
+    Read the clauses of a DIMACS CNF file written by WriteDIMACS
+    """
+    clauses = []
+    with open(filename, "r") as fileobj:
+        for line in fileobj:
+            if line.startswith(("c", "p")) or not line.strip():
+                continue
+            clauses.append([int(x) for x in line.split()[:-1]])
+    return clauses
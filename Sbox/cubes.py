@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class ForbiddenCubes:
+    # 初始化方法，接收一组 0/1 点（例如分割轨迹），其余的点均为不可能点
+    def __init__(self, points):
+        points = np.asarray(points, dtype=np.int64)
+        assert points.ndim == 2 and len(points) > 0
+        self.dimension = points.shape[1]
+        # 点的编号：比特列表按高位在前解释为整数
+        self.weights = 1 << np.arange(self.dimension - 1, -1, -1, dtype=np.int64)
+        self.impossible = np.ones(2**self.dimension, dtype=bool)
+        self.impossible[points @ self.weights] = False
+
+    # 把一个不可能点扩展为极大的不可能子立方体
+    def Expand(self, index, order):
+        """
+        Grow the subcube {index} by freeing the coordinates in the given bit order as long as every point
+        of the subcube stays impossible. Return (free mask, members)
+        """
+        members = np.array([index], dtype=np.int64)
+        free = 0
+        for bit in order:
+            flipped = members ^ (1 << bit)
+            if self.impossible[flipped].all():
+                members = np.concatenate((members, flipped))
+                free |= 1 << bit
+        return free, members
+
+    # 将子立方体转换为去掉该立方体的不等式
+    def CubeInequality(self, index, free):
+        """
+        Return the inequality [a_1, ..., a_n, b] that is violated exactly on the subcube given by a point
+        index and its free mask: sum of x_i over fixed zeros plus sum of (1 - x_i) over fixed ones >= 1
+        """
+        row = np.zeros(self.dimension + 1, dtype=np.int64)
+        for c in range(self.dimension):
+            bit = self.dimension - 1 - c
+            if (free >> bit) & 1:
+                continue
+            if (index >> bit) & 1:
+                row[c] = -1
+                row[-1] += 1
+            else:
+                row[c] = 1
+        row[-1] -= 1
+        return row
+
+    # 逐个生成极大不可能子立方体
+    def IterCubes(self, variants=1):
+        """
+        Yield maximal forbidden subcubes as (point index, free mask). Every impossible point not yet covered
+        is expanded once per bit order variant, so the impossible points are covered in a single pass
+        """
+        covered = ~self.impossible
+        orders = [[(k + i) % self.dimension for i in range(self.dimension)] for k in range(variants)]
+        for index in np.flatnonzero(self.impossible):
+            if covered[index]:
+                continue
+            for order in orders:
+                free, members = self.Expand(int(index), order)
+                covered[members] = True
+                yield int(index), free
+
+    # 分块生成候选不等式
+    def Candidates(self, chunk=4096, variants=1):
+        """
+        Yield candidate inequalities, one per maximal forbidden subcube, in chunks of at most chunk rows.
+        Only the coverage table and the current chunk are kept in memory
+        """
+        rows = []
+        for index, free in self.IterCubes(variants):
+            rows.append(self.CubeInequality(index, free))
+            if len(rows) >= chunk:
+                yield np.array(rows, dtype=np.int64)
+                rows = []
+        if rows:
+            yield np.array(rows, dtype=np.int64)
@@ -0,0 +1,87 @@
+import itertools
+
+import numpy as np
+
+# 穷举比特置换的最大 S 盒大小，更大的 S 盒只在输入、输出异或常数下规范化
+MAX_PERMUTATION_SIZE = 5
+
+
+def PermutationTable(perm, size):
+    """
+    Return the table v -> P(v) of the bit permutation that moves bit i of v to bit perm[i]
+    """
+    values = np.arange(2**size, dtype=np.int64)
+    table = np.zeros(2**size, dtype=np.int64)
+    for i, j in enumerate(perm):
+        table |= ((values >> i) & 1) << j
+    return table
+
+
+def InversePermutation(perm):
+    inverse = [0] * len(perm)
+    for i, j in enumerate(perm):
+        inverse[j] = i
+    return tuple(inverse)
+
+
+def Canonicalize(sbox):
+    """
+    Map an sbox S to the representative of its class under the transforms that keep division trails:
+    C(x) = Pout(S(Pin(x) ^ cin)) ^ cout, with bit permutations Pin, Pout and constants cin, cout.
+    The representative is the lexicographically smallest table; bit permutations are only searched
+    for sboxes of at most MAX_PERMUTATION_SIZE bits. Return (C, transform)
+    """
+    table = np.asarray(sbox, dtype=np.int64)
+    size = len(format(len(table), "b")) - 1
+    assert len(table) == 2**size
+    if size <= MAX_PERMUTATION_SIZE:
+        perms = list(itertools.permutations(range(size)))
+    else:
+        perms = [tuple(range(size))]
+    tables = np.array([PermutationTable(p, size) for p in perms])  # 形状：置换数 x 2^n
+    x = np.arange(2**size, dtype=np.int64)
+    constants = np.arange(2**size, dtype=np.int64)
+    # 候选表 [pout, pin, cin, x] = Pout(S(Pin(x) ^ cin))
+    inner = table[tables[:, None, :] ^ constants[None, :, None]]  # [pin, cin, x]
+    candidates = tables[:, inner]  # [pout, pin, cin, x]
+    # cout 取使 C(0) = 0 的值，这是该 (pout, pin, cin) 下字典序最小的选择
+    candidates = candidates ^ candidates[..., :1]
+    flat = candidates.reshape(-1, 2**size)
+    best = np.lexsort(flat.T[::-1])[0]
+    pout, pin, cin = np.unravel_index(best, candidates.shape[:3])
+    transform = {
+        "size": size,
+        "pin": list(perms[pin]),
+        "cin": int(constants[cin]),
+        "pout": list(perms[pout]),
+        "cout": int(tables[pout][table[constants[cin]]]),  # Pin(0) = 0
+    }
+    return flat[best].tolist(), transform
+
+
+def TransformTrails(inputs, outputs, transform):
+    """
+    Map the division trails (input masks, output masks) of the representative back to the sbox S.
+    With C(x) = Pout(S(Pin(x) ^ cin)) ^ cout the constants do not change the trails, and a trail (u, v)
+    of C gives the trail (Pin(u), Pout^-1(v)) of S
+    """
+    size = transform["size"]
+    pin = PermutationTable(transform["pin"], size)
+    pout_inverse = PermutationTable(InversePermutation(transform["pout"]), size)
+    return pin[np.asarray(inputs, dtype=np.int64)], pout_inverse[np.asarray(outputs, dtype=np.int64)]
+
+
+def TransformInequalities(inequalities, transform):
+    """
+    Map inequalities [a_1, ..., a_2n, b] describing the trails of the representative to inequalities
+    describing the trails of S, by moving the coefficient columns like TransformTrails moves the bits
+    """
+    size = transform["size"]
+    inequalities = np.asarray(inequalities, dtype=np.int64)
+    result = inequalities.copy()
+    # 点的第 c 个坐标（高位在前）对应比特 size - 1 - c
+    pout_inverse = InversePermutation(transform["pout"])
+    for i in range(size):
+        result[:, size - 1 - transform["pin"][i]] = inequalities[:, size - 1 - i]
+        result[:, 2 * size - 1 - pout_inverse[i]] = inequalities[:, 2 * size - 1 - i]
+    return result
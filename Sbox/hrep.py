@@ -0,0 +1,106 @@
+import numpy as np
+from math import gcd
+
+
+class ConvexHull:
+    # 初始化方法，接收一组 0/1 点（例如分割轨迹），每一行是一个点
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=np.int64)
+        assert self.points.ndim == 2 and len(self.points) > 0
+        self.dimension = self.points.shape[1]
+        self.rays = None  # 极射线：不等式 a*x + b >= 0，存为 [a, b]
+        self.lineality = None  # 线性空间：等式 a*x + b = 0
+
+    @staticmethod
+    def Normalize(v):
+        """
+        Divide an integer vector by the gcd of its entries
+        """
+        g = 0
+        for x in v:
+            g = gcd(g, int(x))
+        if g > 1:
+            v = v // g
+        return v
+
+    # 双重描述法（double description）：计算锥 {y : [p, 1] * y >= 0, p 为所有点} 的极射线与线性空间
+    def DoubleDescription(self):
+        """
+        Compute the extreme rays and the lineality space of the cone {y : [p, 1] . y >= 0 for all points p}.
+        Extreme rays are the facet inequalities [a, b] of the convex hull, the lineality space gives
+        its equations
+        """
+        rows = np.concatenate((self.points, np.ones((len(self.points), 1), dtype=np.int64)), axis=1)
+        rows = np.unique(rows, axis=0)
+        size = self.dimension + 1
+        lineality = [v for v in np.eye(size, dtype=np.int64)]  # 初始时锥为整个空间
+        rays = []  # 每条射线记为 (向量, 取等的约束集合的位掩码)
+        for index, a in enumerate(rows):
+            bit = 1 << index
+            values = [int(a @ l) for l in lineality]
+            pivot = next((k for k, x in enumerate(values) if x != 0), None)
+            if pivot is not None:
+                # 线性空间中有一个方向不与该约束正交：用它消去其余方向，并把它变成一条新射线
+                l0 = lineality[pivot]
+                a0 = values[pivot]
+                sign = 1 if a0 > 0 else -1
+                lineality = [ConvexHull.Normalize(abs(a0) * l - sign * x * l0)
+                             for k, (l, x) in enumerate(zip(lineality, values)) if k != pivot]
+                rays = [(ConvexHull.Normalize(abs(a0) * r - sign * int(a @ r) * l0), z | bit) for r, z in rays]
+                rays.append((sign * l0, bit - 1))  # l0 在之前的所有约束上都取等
+                continue
+            # 按约束值把射线分成正、零、负三部分
+            positive, zero, negative = [], [], []
+            for r, z in rays:
+                x = int(a @ r)
+                if x > 0:
+                    positive.append((r, z, x))
+                elif x == 0:
+                    zero.append((r, z | bit))
+                else:
+                    negative.append((r, z, x))
+            # 相邻的正、负射线组合出新的射线（组合判定法）
+            need = size - len(lineality) - 2
+            masks = [z for r, z in rays]
+            combined = []
+            for rp, zp, xp in positive:
+                for rn, zn, xn in negative:
+                    common = zp & zn
+                    if bin(common).count("1") < need:
+                        continue
+                    adjacent = True
+                    for z in masks:
+                        if z != zp and z != zn and (common & ~z) == 0:
+                            adjacent = False
+                            break
+                    if adjacent:
+                        combined.append((ConvexHull.Normalize(xp * rn - xn * rp), common | bit))
+            rays = [(r, z) for r, z, x in positive] + zero + combined
+        self.rays = [r for r, z in rays]
+        self.lineality = lineality
+
+    # 获取凸包的不等式（H-representation）
+    def Inequalities(self):
+        """
+        Return the facet inequalities of the convex hull as an integer array, each row [a_1, ..., a_n, b]
+        stands for a_1 x_1 + ... + a_n x_n + b >= 0
+        """
+        if self.rays is None:
+            self.DoubleDescription()
+        # 去掉平凡不等式 1 >= 0
+        rays = [r for r in self.rays if np.any(r[:-1] != 0)]
+        if not rays:
+            return np.zeros((0, self.dimension + 1), dtype=np.int64)
+        return np.array(sorted(r.tolist() for r in rays), dtype=np.int64)
+
+    # 获取凸包所在仿射包的等式
+    def Equations(self):
+        """
+        Return the equations of the affine hull as an integer array, each row [a_1, ..., a_n, b]
+        stands for a_1 x_1 + ... + a_n x_n + b = 0
+        """
+        if self.rays is None:
+            self.DoubleDescription()
+        if not self.lineality:
+            return np.zeros((0, self.dimension + 1), dtype=np.int64)
+        return np.array(self.lineality, dtype=np.int64)
@@ -1,3 +1,61 @@
+import numpy as np
+
+# 二进制分割轨迹文件的格式：16 字节文件头（魔数、版本、S 盒大小、掩码字节数、轨迹条数），
+# 之后是定长的 (输入掩码, 输出掩码) 行
+TRAIL_MAGIC = b"SBDT"
+TRAIL_VERSION = 1
+TRAIL_HEADER = np.dtype([("magic", "S4"), ("version", "u1"), ("size", "u1"), ("itemsize", "u1"),
+                         ("reserved", "u1"), ("count", "<u8")])
+
+
+def TrailDtype(itemsize):
+    """
+    Return the row dtype of a binary division trail file whose masks are itemsize bytes wide
+    """
+    return np.dtype([("input", "<u%d" % itemsize), ("output", "<u%d" % itemsize)])
+
+
+def WriteDivisionTrails(filename, inputs, outputs, size):
+    """
+    Write division trails given as input/output mask arrays into a binary trail file
+    """
+    itemsize = 1 if size <= 8 else (2 if size <= 16 else 4)
+    rows = np.empty(len(inputs), dtype=TrailDtype(itemsize))
+    rows["input"] = inputs
+    rows["output"] = outputs
+    header = np.zeros(1, dtype=TRAIL_HEADER)
+    header[0] = (TRAIL_MAGIC, TRAIL_VERSION, size, itemsize, 0, len(rows))
+    with open(filename, "wb") as fileobj:
+        fileobj.write(header.tobytes())
+        fileobj.write(rows.tobytes())
+
+
+def ReadDivisionTrails(filename):
+    """
+    Memory-map a binary trail file, return (rows, size) where rows has the fields "input" and "output"
+    """
+    header = np.fromfile(filename, dtype=TRAIL_HEADER, count=1)
+    assert len(header) == 1 and header[0]["magic"] == TRAIL_MAGIC, "不是分割轨迹文件: %s" % filename
+    assert header[0]["version"] == TRAIL_VERSION
+    size = int(header[0]["size"])
+    count = int(header[0]["count"])
+    dtype = TrailDtype(int(header[0]["itemsize"]))
+    if count == 0:
+        return np.zeros(0, dtype=dtype), size
+    rows = np.memmap(filename, dtype=dtype, mode="r", offset=TRAIL_HEADER.itemsize, shape=(count,))
+    return rows, size
+
+
+def TrailPoints(inputs, outputs, size):
+    """
+    Expand input/output masks into 0/1 points (input bits then output bits, most significant bit first)
+    """
+    shifts = np.arange(size - 1, -1, -1)
+    a = (np.asarray(inputs, dtype=np.int64)[:, None] >> shifts) & 1
+    b = (np.asarray(outputs, dtype=np.int64)[:, None] >> shifts) & 1
+    return np.concatenate((a, b), axis=1).astype(np.uint8)
+
+
 class Sbox:
     # 初始化方法，接收 S-box 映射，并计算 S-box 的大小
     def __init__(self, sbox):
@@ -53,73 +111,123 @@ class Sbox:
                     table[k + 2**(self.SBOXSIZE - 1 - i) + j*(2**(self.SBOXSIZE - i))] ^\
                     table[k + j*(2**(self.SBOXSIZE - i))]
 
+    # 将所有乘积函数 Pi_u(S(x)) 的真值表按位打包成 uint64 矩阵
+    def PackedTruthTables(self):
+        """
+        Return the truth tables of all product functions Pi_u(y), y = sbox(x), bit-packed row by row:
+        bit x of row u is Pi_u(sbox(x)), stored little-endian in uint64 words
+        """
+        size = len(self.sbox)
+        y = np.asarray(self.sbox, dtype=np.uint32)
+        u = np.arange(size, dtype=np.uint32)
+        # table[u][x] = 1 当且仅当 u 是 S(x) 的子集
+        table = (y[None, :] & u[:, None]) == u[:, None]
+        packed = np.packbits(table, axis=1, bitorder="little")
+        # 每行补齐到 8 字节的整数倍，以便按 uint64 处理
+        pad = (-packed.shape[1]) % 8
+        if pad:
+            packed = np.pad(packed, ((0, 0), (0, pad)))
+        return np.ascontiguousarray(packed).view("<u8")
+
+    # 对按位打包的真值表矩阵做 Moebius 变换（蝶形运算），一次处理所有行
+    def PackedMoebius(self, words):
+        """
+        In-place binary Moebius transform of every row of a bit-packed truth table matrix,
+        the batched equivalent of ProcessTable
+        """
+        # 字内的位：bit i 为 1 的位置异或上 bit i 为 0 的位置
+        masks = [0x5555555555555555, 0x3333333333333333, 0x0F0F0F0F0F0F0F0F,
+                 0x00FF00FF00FF00FF, 0x0000FFFF0000FFFF, 0x00000000FFFFFFFF]
+        for i in range(0, min(self.SBOXSIZE, 6)):
+            words ^= (words & np.uint64(masks[i])) << np.uint64(2**i)
+        # 跨字的位：按字的下标做同样的蝶形运算
+        for i in range(6, self.SBOXSIZE):
+            stride = 2**(i - 6)
+            view = words.reshape(words.shape[0], -1, 2, stride)
+            view[:, :, 1, :] ^= view[:, :, 0, :]
+        return words
+
+    # 生成 S-box 的 ANF 矩阵形式
+    def CreatANFMatrix(self, packed=False):
+        """
+        Return the ANF of all 2^n product functions at once as a 2^n x 2^n matrix, where entry [u][w]
+        is the coefficient of the monomial x^w in Pi_u(sbox(x)). With packed=True the rows are returned
+        bit-packed in uint64 words (bit w of row u)
+        """
+        words = self.PackedMoebius(self.PackedTruthTables())
+        if packed:
+            return words
+        bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder="little")
+        return bits[:, :len(self.sbox)]
+
     # 生成 S-box 的代数普通形式（ANF）
     def CreatANF(self):
         """
         Return the ANF of the sbox, moreover, this function also return the ANF of boolean function which
         is the product of some coordinates of the sbox output
         """
-        # 初始化 ANF，列表大小与 S-box 长度相同
+        matrix = self.CreatANFMatrix()
+        # 初始化 ANF，列表大小与 S-box 长度相同，ANF[0] 保持为空
         ANF = [[] for i in range(0, len(self.sbox))]
-        # 对 S-box 输出的每一项计算真值表，并处理为 ANF
         for i in range(1, len(self.sbox)):
-            table = self.GetTruthTable(i)
-            self.ProcessTable(table)
-            sqr = []
-            for j in range(0, len(self.sbox)):
-                if table[j] != 0:  # 如果真值表中的值不为 0，加入到结果中
-                    sqr.append(j)
-            ANF[i] = sqr  # 更新 ANF
+            ANF[i] = np.flatnonzero(matrix[i]).tolist()  # 系数不为 0 的单项式
         return ANF
 
+    # 沿最后一维做超集 OR 变换：结果[..., i] = 是否存在 w ⊇ i 使 table[..., w] 为真
+    def SupersetClosure(self, table):
+        """
+        Superset (zeta) OR-transform along the last axis of a boolean array of length 2^n
+        """
+        table = np.array(table, dtype=bool)
+        for b in range(0, self.SBOXSIZE):
+            view = table.reshape(-1, 2**(self.SBOXSIZE - 1 - b), 2, 2**b)
+            view[:, :, 0, :] |= view[:, :, 1, :]
+        return table
+
+    # 沿最后一维做子集 OR 变换：结果[..., j] = 是否存在 k ⊆ j 使 table[..., k] 为真
+    def SubsetClosure(self, table):
+        """
+        Subset (zeta) OR-transform along the last axis of a boolean array of length 2^n
+        """
+        table = np.array(table, dtype=bool)
+        for b in range(0, self.SBOXSIZE):
+            view = table.reshape(-1, 2**(self.SBOXSIZE - 1 - b), 2, 2**b)
+            view[:, :, 1, :] |= view[:, :, 0, :]
+        return table
+
+    # 以掩码形式生成所有分割轨迹
+    def CreateDivisionTrailMasks(self):
+        """
+        Return all the division trails of a given sbox as two integer arrays (input masks, output masks),
+        in the same order as CreateDivisionTrails
+        """
+        size = len(self.sbox)
+        # cover[j][i] = ANF[j] 中是否存在单项式 entry ⊇ i
+        cover = self.SupersetClosure(self.CreatANFMatrix())
+        cover[0, :] = False  # 与原实现一致，输出掩码从 1 开始
+        valid = np.ascontiguousarray(cover.T)  # valid[i][j]
+        # below[i][j] = 是否存在真子集 k ⊊ j 使 valid[i][k] 成立，只保留极小元（反链）
+        closure = self.SubsetClosure(valid)
+        below = np.zeros_like(valid)
+        for b in range(0, self.SBOXSIZE):
+            view = below.reshape(size, -1, 2, 2**b)
+            view[:, :, 1, :] |= closure.reshape(size, -1, 2, 2**b)[:, :, 0, :]
+        minimal = valid & ~below
+        minimal[0, :] = False
+        inputs, outputs = np.nonzero(minimal)  # 按 (i, j) 升序排列
+        # 零向量总是第一条分割轨迹
+        inputs = np.concatenate(([0], inputs)).astype(np.int64)
+        outputs = np.concatenate(([0], outputs)).astype(np.int64)
+        return inputs, outputs
+
     # 生成 S-box 的所有分割轨迹（division trails）
     def CreateDivisionTrails(self):
         """
         Return all the division trails of a given sbox
         """
-        ANF = self.CreatANF()  # 获取 S-box 的 ANF
-        INDP = []  # 存储分割轨迹的列表
-        # 将零向量加入分割轨迹
-        sqr = [0 for i in range(2 * self.SBOXSIZE)]
-        INDP.append(sqr)
-        # 从非零向量开始，构建分割轨迹
-        for i in range(1, len(self.sbox)):
-            sqn = []
-            # 遍历所有的非零向量
-            for j in range(1, len(self.sbox)):
-                flag = False
-                for entry in ANF[j]:
-                    if (i | entry) == entry:  # 如果 i 是 entry 的子集
-                        flag = True
-                        break
-                if flag:
-                    sqn1 = []
-                    flag_add = True
-                    for t1 in sqn:
-                        if (t1 | j) == j:  # 检查是否需要添加 j 到结果
-                            flag_add = False
-                            break
-                        elif (t1 | j) == t1:
-                            sqn1.append(t1)
-                    if flag_add:
-                        for t2 in sqn1:
-                            sqn.remove(t2)
-                        sqn.append(j)
-            # 将每个向量转为二进制形式，存入分割轨迹
-            for num in sqn:
-                # 将数字格式化为二进制字符串，并进行反转
-                a = format(i, "0256b")
-                b = format(num, "0256b")
-                a = list(reversed(list(map(int, list(a)))))
-                b = list(reversed(list(map(int, list(b)))))
-                # 只保留前 SBOXSIZE 位
-                a = a[0:self.SBOXSIZE]
-                b = b[0:self.SBOXSIZE]
-                # 反转列表
-                a.reverse()
-                b.reverse()
-                # 添加合并后的结果到分割轨迹中
-                INDP.append((a + b))
+        inputs, outputs = self.CreateDivisionTrailMasks()
+        # 将掩码展开为比特列表，高位在前
+        INDP = TrailPoints(inputs, outputs, self.SBOXSIZE).tolist()
         return INDP
 
     # 将所有分割轨迹写入文件
@@ -133,3 +241,11 @@ class Sbox:
             fileobj.write(str(l) + "\n")  # 将每个分割轨迹写入文件
         fileobj.write("\n")
         fileobj.close()  # 关闭文件
+
+    # 将所有分割轨迹写入二进制文件
+    def WriteDivisionTrails(self, filename):
+        """
+        Write all division trails of an sbox into a binary trail file, see ReadDivisionTrails
+        """
+        inputs, outputs = self.CreateDivisionTrailMasks()
+        WriteDivisionTrails(filename, inputs, outputs, self.SBOXSIZE)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from cubes import ForbiddenCubes
+from equivalence import PermutationTable
+from Reducelin import Reduce
+from validate import CheckInequalities
+
+
+def TrailTable(points, size):
+    """
+    Return the boolean table T[u, v] of an sbox of the given size: True iff (u, v) is a division trail.
+    points are rows of 2 * size bits, input bits first, most significant bit first
+    """
+    points = np.asarray(points, dtype=np.int64)
+    weights = 1 << np.arange(size - 1, -1, -1, dtype=np.int64)
+    table = np.zeros((2**size, 2**size), dtype=bool)
+    table[points[:, :size] @ weights, points[:, size:] @ weights] = True
+    return table
+
+
+def ComposeLayers(table, inputs, wiring):
+    """
+    Propagate fixed input masks through the super sbox S-layer, bit wiring, S-layer, where both layers
+    consist of len(inputs) copies of the sbox with trail table `table`. Bit t * n + b of the word is bit b
+    of sbox t and the wiring moves bit i to bit wiring[i]. Return the boolean table over all outputs of
+    the second layer: True iff the output is reachable by a division trail from the inputs
+    """
+    count = len(inputs)
+    size = len(format(len(table), "b")) - 1
+    # 第一层：各 S 盒输出集合的直积，高位的 S 盒在前
+    middle = table[inputs[0]]
+    for t in range(1, count):
+        middle = np.outer(table[inputs[t]], middle).reshape(-1)
+    # 比特连线
+    wired = np.zeros(len(middle), dtype=bool)
+    wired[PermutationTable(wiring, count * size)] = middle
+    # 第二层：对每个 S 盒所在的轴与轨迹表做布尔矩阵乘法
+    reachable = wired.reshape((2**size,) * count).astype(np.int64)
+    for axis in range(count):
+        reachable = np.tensordot(reachable, table.astype(np.int64), axes=([axis], [0]))
+        reachable = np.moveaxis(np.minimum(reachable, 1), -1, axis)
+    return reachable.reshape(-1) > 0
+
+
+def ReachableInequalities(reachable):
+    """
+    Return reduced inequalities describing exactly the reachable outputs (a boolean table over 2^n masks)
+    as 0/1 points, most significant bit first
+    """
+    dimension = len(format(len(reachable), "b")) - 1
+    index = np.flatnonzero(reachable)
+    points = ((index[:, None] >> np.arange(dimension - 1, -1, -1)) & 1).astype(np.int64)
+    if len(points) == len(reachable):
+        return []
+    inequalities = Reduce.SelectFromChunks(points, ForbiddenCubes(points).Candidates())
+    CheckInequalities(points, inequalities, "super sbox inequalities")
+    return inequalities
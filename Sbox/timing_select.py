@@ -0,0 +1,153 @@
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from gurobipy import GurobiError
+
+from cache import SboxCache
+from cubes import ForbiddenCubes
+from equivalence import TransformInequalities
+from hrep import ConvexHull
+from Reducelin import Reduce
+from validate import CheckInequalities
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# 可用于测速的密码模型：名称 -> (目录, 模块, 类)
+CIPHERS = {
+    "GIFT": ("GIFT-64", "gift", "Gift"),
+    "MIBS": ("MIBS-64", "mibs", "Mibs"),
+    "PRESENT": ("PRESENT-64", "present", "Present"),
+}
+
+
+def LoadCipher(cipher):
+    """
+    Import and return the model class of a cipher listed in CIPHERS
+    """
+    directory, module, name = CIPHERS[cipher]
+    path = os.path.join(ROOT_DIR, directory)
+    if path not in sys.path:
+        sys.path.append(path)
+    return getattr(importlib.import_module(module), name)
+
+
+def CandidateSubsets(cache, time_limit=60):
+    """
+    Return several valid inequality subsets of the class representative as {label: inequalities}:
+    the full H-representation (4-bit sboxes only), greedy reductions of the hull and of the forbidden
+    subcubes, and the exact minimum of the smaller candidate set
+    """
+    points = cache.CanonicalPoints()
+    candidates = {}
+    sources = {"cubes": np.concatenate(list(ForbiddenCubes(points).Candidates()))}
+    if cache.SBOXSIZE <= 4:
+        sources["hull"] = ConvexHull(points).Inequalities()
+        candidates["full"] = sources["hull"].tolist()
+    for name, inequalities in sources.items():
+        candidates["greedy_" + name] = Reduce.SelectInequalities(points, inequalities.tolist())
+    smallest = min(sources.values(), key=len).tolist()
+    candidates["exact"], _ = Reduce.ExactSelectInequalities(points, smallest, time_limit)
+    return candidates
+
+
+def MeasureSolveTime(cipher, rounds, inequalities, constant_bits):
+    """
+    Build and solve the round-reduced cipher model with the given sbox inequalities in a temporary
+    directory, return the elapsed time in seconds
+    """
+    model = LoadCipher(cipher)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            obj = model(rounds, inequalities=inequalities)
+            obj.set_brute_force_flag('1')
+            obj.constant_bits = constant_bits
+            start = time.time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                obj.make_model()
+                obj.solve_model()
+            return time.time() - start
+        finally:
+            os.chdir(cwd)
+
+
+def WriteJson(path, obj):
+    with open(path, "w") as fileobj:
+        json.dump(obj, fileobj, indent=1)
+
+
+def SelectionKey(cipher, rounds):
+    return "%s_%d-%d" % (cipher, min(rounds), max(rounds))
+
+
+def SelectBySolveTime(sbox, cipher, rounds, constant_bits=(0,), time_limit=60, directory=None, rerun=False):
+    """
+    Benchmark the candidate subsets of an sbox on the round-reduced models of a cipher (rounds is an
+    iterable of round counts) and keep the subset with the lowest total solve time; subsets whose models fail to solve are
+    recorded with time None. The choice and all
+    timings are stored in the sbox cache and reused by later calls unless rerun is True.
+    Return (label, inequalities, timings) with inequalities in the coordinates of sbox
+    """
+    cache = SboxCache(sbox, directory=directory)
+    path = os.path.join(cache.directory, "selection.json")
+    selections = {}
+    if os.path.exists(path):
+        with open(path, "r") as fileobj:
+            selections = json.load(fileobj)
+    key = SelectionKey(cipher, rounds)
+    if rerun or key not in selections:
+        candidates = CandidateSubsets(cache, time_limit)
+        timings = {}
+        for label, inequalities in candidates.items():
+            actual = TransformInequalities(inequalities, cache.transform).tolist()
+            try:
+                timings[label] = sum(MeasureSolveTime(cipher, r, actual, list(constant_bits)) for r in rounds)
+            except GurobiError as error:
+                # 例如模型超出许可证规模，该子集记为未测得
+                print("%s: %s" % (label, error))
+                timings[label] = None
+        measured = [label for label in timings if timings[label] is not None]
+        if not measured:
+            raise ValueError("no inequality subset could be solved for %s" % key)
+        best = min(measured, key=timings.get)
+        CheckInequalities(cache.CanonicalPoints(), candidates[best], "selected inequalities")
+        selections[key] = {"label": best, "inequalities": candidates[best], "timings": timings}
+        cache.Store(path, lambda temp: WriteJson(temp, selections))
+    choice = selections[key]
+    inequalities = TransformInequalities(choice["inequalities"], cache.transform).tolist()
+    return choice["label"], inequalities, choice["timings"]
+
+
+def LookupSelection(sbox, cipher, rounds, directory=None):
+    """
+    Return the stored fastest subset of an sbox for a cipher and round range, or None
+    """
+    cache = SboxCache(sbox, directory=directory)
+    path = os.path.join(cache.directory, "selection.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as fileobj:
+        choice = json.load(fileobj).get(SelectionKey(cipher, rounds))
+    if choice is None:
+        return None
+    return TransformInequalities(choice["inequalities"], cache.transform).tolist()
+
+
+if __name__ == "__main__":
+    # 用法: python timing_select.py "[S盒]" 密码名称(GIFT/MIBS) 起始轮数-结束轮数
+    from Batch_Analyse import parse_sbox
+    sbox = parse_sbox(sys.argv[1] if len(sys.argv) > 1 else input("S盒: "))
+    cipher = sys.argv[2] if len(sys.argv) > 2 else input("密码名称（GIFT/MIBS）: ")
+    first, last = (sys.argv[3] if len(sys.argv) > 3 else input("轮数范围（例如 3-5）: ")).split("-")
+    label, inequalities, timings = SelectBySolveTime(sbox, cipher.upper(), range(int(first), int(last) + 1))
+    for name, elapsed in timings.items():
+        print("%s: %s" % (name, "-" if elapsed is None else "%.2fs" % elapsed))
+    print("最快的子集为 %s，共 %d 个不等式" % (label, len(inequalities)))
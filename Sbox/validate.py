@@ -0,0 +1,83 @@
+import sys
+
+import numpy as np
+
+from sbox import ReadDivisionTrails, TrailPoints
+
+
+def AllPoints(dimension):
+    """
+    Return all 2^dimension 0/1 points as rows, most significant bit first, in index order
+    """
+    index = np.arange(2**dimension, dtype=np.int64)
+    return ((index[:, None] >> np.arange(dimension - 1, -1, -1)) & 1).astype(np.int32)
+
+
+def SatisfiedPoints(inequalities, dimension, budget=1 << 26):
+    """
+    Return a boolean table over all 2^dimension points: True where every inequality a.x + b >= 0 holds.
+    The points are split into a high and a low half of the coordinates, so that a.x = H[high] + L[low];
+    the sums are formed for blocks of inequalities with at most budget elements at a time
+    """
+    ine = np.asarray(inequalities, dtype=np.int64).reshape(-1, dimension + 1)
+    high = dimension // 2
+    low = dimension - high
+    coefficients = ine[:, :-1].T.astype(np.int32)
+    H = AllPoints(high) @ coefficients[:high] + ine[:, -1].astype(np.int32)  # 2^high x 不等式数
+    L = AllPoints(low) @ coefficients[high:]  # 2^low x 不等式数
+    satisfied = np.ones((2**high, 2**low), dtype=bool)
+    chunk = max(1, budget // 2**dimension)
+    for start in range(0, len(ine), chunk):
+        values = H[:, None, start:start + chunk] + L[None, :, start:start + chunk]
+        satisfied &= (values >= 0).all(axis=-1)
+    return satisfied.reshape(-1)
+
+
+def ValidateInequalities(points, inequalities):
+    """
+    Check that inequalities describe exactly the 0/1 points: every point satisfies all inequalities and
+    every other point of {0,1}^n violates at least one. Return a report with the indices (most significant
+    bit first) of the false positives (accepted but not a point) and false negatives (a rejected point)
+    """
+    points = np.asarray(points, dtype=np.int64)
+    dimension = points.shape[1]
+    weights = 1 << np.arange(dimension - 1, -1, -1, dtype=np.int64)
+    expected = np.zeros(2**dimension, dtype=bool)
+    expected[points @ weights] = True
+    satisfied = SatisfiedPoints(inequalities, dimension)
+    report = {
+        "valid": bool((satisfied == expected).all()),
+        "false_positives": np.flatnonzero(satisfied & ~expected).tolist(),
+        "false_negatives": np.flatnonzero(~satisfied & expected).tolist(),
+    }
+    return report
+
+
+def CheckInequalities(points, inequalities, name="inequalities"):
+    """
+    Raise ValueError unless the inequalities describe exactly the points, see ValidateInequalities
+    """
+    report = ValidateInequalities(points, inequalities)
+    if not report["valid"]:
+        raise ValueError("%s do not describe the division trails: %d false positives (e.g. %s), "
+                         "%d false negatives (e.g. %s)" % (
+                             name, len(report["false_positives"]), report["false_positives"][:5],
+                             len(report["false_negatives"]), report["false_negatives"][:5]))
+    return report
+
+
+if __name__ == "__main__":
+    # 用法: python validate.py 分割轨迹文件(.bin) 不等式文件
+    trails_filename = sys.argv[1] if len(sys.argv) > 1 else input("分割轨迹文件: ")
+    inequalities_filename = sys.argv[2] if len(sys.argv) > 2 else input("不等式文件: ")
+    rows, size = ReadDivisionTrails(trails_filename)
+    points = TrailPoints(rows["input"], rows["output"], size)
+    with open(inequalities_filename, "r") as fileobj:
+        text = fileobj.read().replace("[", " ").replace("]", " ").replace(",", " ")
+    inequalities = [list(map(int, line.split())) for line in text.splitlines() if line.strip()]
+    report = ValidateInequalities(points, inequalities)
+    if report["valid"]:
+        print("不等式恰好描述了 %d 条分割轨迹" % len(points))
+    else:
+        print("误接受的点: %d 个 %s" % (len(report["false_positives"]), report["false_positives"][:20]))
+        print("误排除的轨迹: %d 个 %s" % (len(report["false_negatives"]), report["false_negatives"][:20]))